@@ -1,10 +1,21 @@
+import atexit
 from flask import Flask, app, render_template, request, jsonify
 from flask_socketio import SocketIO
 from app.services.recording import RecordingService
 from app.services.sentiment import SentimentService
 from app.services.sentiment_factory import SentimentStrategyFactory
+from app.services.inference_batcher import InferenceBatcher
+from app.services.work_pipeline import WorkPipeline
+from app.services.sentiment_cache import SentimentCache, CachedSentimentModel
+from app.services.frame_sampler import AdaptiveFrameSampler
+from app.services.persistence_queue import PersistenceQueue
+from app.services.session_registry import SessionRegistry
+from app.services.state_backend import create_state_backend
+from app.services.translation_cache import TranslationCache
 from app.utils.translator_service import TranslatorService
+from app.utils.translation_backends import create_translation_backend
 from app.models import bert_model
+from app.models.lexicon_model import LexiconModel
 from app.config.config import Config
 from app.sockets.chat import ChatNamespace
 from app.sockets.recording import RecordingNamespace
@@ -20,24 +31,114 @@ def create_app():
     return app
 
 app = create_app()
-socketio = SocketIO(app, cors_allowed_origins="*")
+socketio = SocketIO(app, cors_allowed_origins="*", message_queue=Config.SOCKETIO_MESSAGE_QUEUE,
+                    async_mode=Config.SOCKETIO_ASYNC_MODE)
 
-bert_model_instance = bert_model.BertModel(Config.MODEL_PATH, Config.TOKENIZER_PATH)
-strategy = SentimentStrategyFactory.get_strategy("bert", model=bert_model_instance)
+bert_model_instance = bert_model.BertModel(Config.MODEL_PATH, Config.TOKENIZER_PATH,
+                                           graph_inference=Config.BERT_GRAPH_INFERENCE,
+                                           length_buckets=Config.BERT_LENGTH_BUCKETS)
+bert_batcher = InferenceBatcher(bert_model_instance, Config.BERT_MAX_BATCH_SIZE, Config.BERT_BATCH_WINDOW_MS)
+sentiment_cache = SentimentCache(Config.SENTIMENT_CACHE_SIZE, Config.SENTIMENT_CACHE_TTL_S)
+cached_bert = CachedSentimentModel(bert_batcher, sentiment_cache, normalizer=bert_model_instance.normalize)
+if Config.SENTIMENT_STRATEGY == "cascade":
+    strategy = SentimentStrategyFactory.get_strategy(
+        "cascade", model=cached_bert, fast_model=LexiconModel(),
+        threshold=Config.SENTIMENT_ALERT_THRESHOLD, margin=Config.CASCADE_MARGIN,
+    )
+else:
+    strategy = SentimentStrategyFactory.get_strategy(Config.SENTIMENT_STRATEGY, model=cached_bert)
 sentiment_service = SentimentService(strategy)
 
-recording_service = RecordingService()
+state_backend = create_state_backend(Config.STATE_BACKEND, Config.STATE_DB_PATH, Config.STATE_OWNER_TTL_S)
+persistence_queue = PersistenceQueue(Config.PERSISTENCE_QUEUE_SIZE)
+session_registry = SessionRegistry(Config.SESSION_TTL_S, Config.SESSION_DISCONNECT_TTL_S, Config.SESSION_MAX_USERS,
+                                   Config.SESSION_MEMORY_CAP_MB, Config.SESSION_SWEEP_INTERVAL_S)
+recording_service = RecordingService(Config.EMOTION_MAX_BATCH_SIZE, Config.EMOTION_BATCH_WINDOW_MS,
+                                     frame_workers=Config.FRAME_WORKERS, frame_worker_slots=Config.FRAME_WORKER_SLOTS,
+                                     frame_slot_wait_s=Config.FRAME_SLOT_WAIT_S,
+                                     face_redetect_every=Config.FACE_REDETECT_EVERY,
+                                     face_track_min_similarity=Config.FACE_TRACK_MIN_SIMILARITY,
+                                     frame_dedup_max_distance=Config.FRAME_DEDUP_MAX_DISTANCE,
+                                     frame_dedup_max_reuse=Config.FRAME_DEDUP_MAX_REUSE,
+                                     frame_dedup_max_age_s=Config.FRAME_DEDUP_MAX_AGE_S,
+                                     frame_sampler=AdaptiveFrameSampler(Config.FRAME_MIN_INTERVAL_S,
+                                                                        Config.FRAME_MAX_INTERVAL_S,
+                                                                        Config.FRAME_TARGET_P95_MS,
+                                                                        Config.FRAME_MAX_IN_FLIGHT),
+                                     frame_decode_scale=Config.FRAME_DECODE_SCALE,
+                                     log_flush_every=Config.LOG_FLUSH_EVERY,
+                                     log_flush_interval_s=Config.LOG_FLUSH_INTERVAL_S,
+                                     persistence=persistence_queue,
+                                     registry=session_registry,
+                                     state=state_backend)
 chat_manager = recording_service.chat_manager
 
-translator_service = TranslatorService()
 
-chat_namespace = ChatNamespace('/chat', sentiment_service, recording_service, translator_service)
-recording_namespace = RecordingNamespace('/recording', recording_service)
+def _flush_on_shutdown():
+    # buffered events to the session logs, then let queued Excel exports finish
+    session_registry.close()
+    # frames already admitted finish (and log) before the pool they may be waiting on goes away
+    frame_pipeline.shutdown()
+    if recording_service.frame_pool is not None:
+        # worker processes and their shared-memory frame slots
+        recording_service.frame_pool.close()
+    recording_service.logger_manager.flush_all()
+    persistence_queue.close()
+    state_backend.close()
+    translator_service.close()
+    translation_cache.close()
+
+
+atexit.register(_flush_on_shutdown)
+
+translation_cache = TranslationCache(Config.TRANSLATION_CACHE_SIZE, Config.TRANSLATION_CACHE_TTL_S,
+                                     Config.TRANSLATION_CACHE_PATH)
+translator_service = TranslatorService(cache=translation_cache, max_workers=Config.TRANSLATION_WORKERS,
+                                       deadline_s=Config.TRANSLATION_DEADLINE_S,
+                                       breaker_failures=Config.TRANSLATION_BREAKER_FAILURES,
+                                       breaker_cooldown_s=Config.TRANSLATION_BREAKER_COOLDOWN_S,
+                                       backend=create_translation_backend(Config.TRANSLATION_BACKEND,
+                                                                          Config.PHRASE_TABLE_DIR),
+                                       backends={lang: create_translation_backend(kind, Config.PHRASE_TABLE_DIR)
+                                                 for lang, kind in Config.TRANSLATION_BACKENDS.items()})
+work_pipeline = WorkPipeline(Config.PIPELINE_WORKERS, name="chat-pipeline")
+frame_pipeline = WorkPipeline(Config.FRAME_PIPELINE_WORKERS, name="frame-pipeline")
+
+chat_namespace = ChatNamespace('/chat', sentiment_service, recording_service, translator_service,
+                               typing_min_interval_s=Config.TYPING_MIN_INTERVAL_S,
+                               alert_threshold=Config.SENTIMENT_ALERT_THRESHOLD,
+                               pipeline=work_pipeline)
+matchmaking = state_backend.matchmaking(translator_service.get_language if Config.MATCH_BY_LANGUAGE else None,
+                                        strict=Config.MATCH_LANGUAGE_STRICT)
+recording_namespace = RecordingNamespace('/recording', recording_service, matchmaking, pipeline=frame_pipeline)
 events_namespace = EventsNamespace('/events', recording_service)
 
 socketio.on_namespace(chat_namespace)
 socketio.on_namespace(recording_namespace)
 socketio.on_namespace(events_namespace)
+session_registry.start()
+
+@app.route('/stats')
+def stats():
+    return jsonify({
+        "bert_batcher": bert_batcher.stats(),
+        "sentiment_cache": sentiment_cache.stats(),
+        "typing_coalescer": chat_namespace.typing_coalescer.stats(),
+        "work_pipeline": work_pipeline.stats(),
+        "frame_pipeline": frame_pipeline.stats(),
+        "emotion_engine": recording_service.emotion_engine.stats() if recording_service.emotion_engine else {},
+        "frame_workers": recording_service.frame_pool.stats() if recording_service.frame_pool else {},
+        "face_tracking": recording_service.tracking.stats(),
+        "frame_dedup": recording_service.frame_dedup.stats(),
+        "frame_sampler": recording_service.frame_sampler.stats(),
+        "persistence": persistence_queue.stats(),
+        "sessions": session_registry.stats(),
+        "matchmaking": matchmaking.stats(),
+        "state": state_backend.stats(),
+        "translation_cache": translation_cache.stats(),
+        "translator": translator_service.stats(),
+        "sentiment_strategy": strategy.stats() if hasattr(strategy, "stats") else {},
+    })
 # translate_client = None
 
 
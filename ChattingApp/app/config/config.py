@@ -3,4 +3,84 @@ class Config:
     SECRET_KEY = "your-secret-key"
     MODEL_PATH = "app/assets/saved_model_weights.h5"
     TOKENIZER_PATH = "app/assets"
-    
\ No newline at end of file
+    
+    BERT_GRAPH_INFERENCE = True
+    BERT_LENGTH_BUCKETS = (8, 16, 32, 50)
+    BERT_BATCH_WINDOW_MS = 5
+    BERT_MAX_BATCH_SIZE = 32
+
+    SENTIMENT_CACHE_SIZE = 4096
+    SENTIMENT_CACHE_TTL_S = 600
+
+    TYPING_MIN_INTERVAL_S = 0.15
+
+    SENTIMENT_STRATEGY = "cascade"  # "bert" or "cascade"
+    SENTIMENT_ALERT_THRESHOLD = 0.31
+    CASCADE_MARGIN = 0.15
+
+    PIPELINE_WORKERS = 4
+
+    EMOTION_BATCH_WINDOW_MS = 10
+    EMOTION_MAX_BATCH_SIZE = 32
+
+    FRAME_WORKERS = 0  # 0: analyse frames in the server process, -1: one worker process per spare core
+    FRAME_WORKER_SLOTS = 4
+    # threads that decode and analyse frames off the socket handlers; as many frames as this
+    # can wait on the emotion batcher at once, so it bounds the batch size frames reach
+    FRAME_PIPELINE_WORKERS = 8
+    FRAME_SLOT_WAIT_S = 0.05  # a frame whose worker has no free slot by then is dropped
+
+    FACE_REDETECT_EVERY = 5  # frames a tracked face box is reused before running the detector again
+    FACE_TRACK_MIN_SIMILARITY = 0.7
+
+    FRAME_DEDUP_MAX_DISTANCE = 4  # average-hash bits a frame may differ by and still reuse the last emotion result
+    FRAME_DEDUP_MAX_REUSE = 10  # ...but re-analyse after that many reused frames
+    FRAME_DEDUP_MAX_AGE_S = 2.0  # ...or once the result is that old
+
+    FRAME_MIN_INTERVAL_S = 0.4
+    FRAME_MAX_INTERVAL_S = 3.0
+    FRAME_TARGET_P95_MS = 250  # frame analysis latency above which users' frame intervals are widened
+    FRAME_MAX_IN_FLIGHT = 8
+
+    FRAME_DECODE_SCALE = 2  # 1, 2, 4 or 8: JPEG frames are decoded at 1/scale for face detection
+
+    LOG_FLUSH_EVERY = 500  # events buffered per user before they are appended to data/sessions/
+    LOG_FLUSH_INTERVAL_S = 10
+
+    PERSISTENCE_QUEUE_SIZE = 64  # pending background save jobs before stop_recording handlers wait
+
+    SESSION_TTL_S = 1800  # idle users' state (loggers, pairings, counters) is flushed and released after this
+    SESSION_DISCONNECT_TTL_S = 120
+    SESSION_MAX_USERS = 2000
+    SESSION_MEMORY_CAP_MB = 256
+    SESSION_SWEEP_INTERVAL_S = 30
+
+    MATCH_BY_LANGUAGE = False  # pair waiting users with the same chat language first
+    MATCH_LANGUAGE_STRICT = False  # never pair users whose (known) languages differ
+
+    # "memory": one server process; "sqlite": pairings, sessions and partner maps shared by
+    # every worker process on this host through STATE_DB_PATH (WAL mode)
+    STATE_BACKEND = "memory"
+    STATE_DB_PATH = "data/state.sqlite3"
+    STATE_OWNER_TTL_S = 30.0  # rows of a process that has not heartbeated for this long are dropped
+    # with more than one worker process every one of them must use the same queue,
+    # e.g. "redis://localhost:6379/0", so emits reach clients connected to another worker
+    SOCKETIO_MESSAGE_QUEUE = None
+    # pipeline, batcher, persistence and sweeper threads all emit and change rooms; only the
+    # threading mode lets native threads do that (gevent/eventlet would need monkey-patching,
+    # which turns those threads and the frame worker pool's queues into greenlets)
+    SOCKETIO_ASYNC_MODE = "threading"
+
+    TRANSLATION_CACHE_SIZE = 20000
+    TRANSLATION_CACHE_TTL_S = 7 * 24 * 3600
+    TRANSLATION_CACHE_PATH = "data/translations.sqlite3"  # None: in memory only, cold after a restart
+
+    TRANSLATION_WORKERS = 8
+    TRANSLATION_DEADLINE_S = 1.5  # languages not translated by then are sent as the original text
+    TRANSLATION_BREAKER_FAILURES = 3  # consecutive failed / too slow calls before a language's translator is skipped
+    TRANSLATION_BREAKER_COOLDOWN_S = 30
+
+    # "online" (the `translate` package), "local" (phrase tables, no network) or None: online when installed
+    TRANSLATION_BACKEND = None
+    TRANSLATION_BACKENDS = {}  # per-language overrides, e.g. {"en": "local"} keeps text_for_bert off the network
+    PHRASE_TABLE_DIR = "app/assets/phrase_tables"  # <lang>.json: {source phrase: translation}
@@ -24,6 +24,24 @@ def model_builder(bert_model, max_):
 
     return model
 
+def inference_fn_builder(bert_model, head, lengths):
+    # calls the shared BERT layer and classifier head directly so the graph is not
+    # tied to the (None, max_) Keras inputs; one concrete function per padded length
+    @tf.function
+    def serve(input_ids, attention_masks):
+        embeddings = bert_model([input_ids, attention_masks], training=False)[1]
+        return head(embeddings)
+
+    serve_fns = {}
+    for length in lengths:
+        spec = tf.TensorSpec(shape=(None, length), dtype=tf.int32)
+        serve_fns[length] = serve.get_concrete_function(spec, spec)
+    return serve_fns
+
+class NormalizedText(str):
+    # marks text that already went through BertModel.normalize
+    pass
+
 class BertModel(BaseModel):
     _instance = None
 
@@ -32,13 +50,18 @@ class BertModel(BaseModel):
             cls._instance = super().__new__(cls)
         return cls._instance
     
-    def __init__(self, model_path, tokenizer_path, max_len=50):
+    def __init__(self, model_path, tokenizer_path, max_len=50, graph_inference=True, length_buckets=(8, 16, 32)):
         self.bert_model = TFBertModel.from_pretrained('bert-base-uncased')
         self.lametizer = WordNetLemmatizer()
         self.MAX_LEN = max_len
         self.loaded_model = model_builder(self.bert_model, self.MAX_LEN)
         self.loaded_model.load_weights(model_path)
         self.tokenizer = BertTokenizerFast.from_pretrained(tokenizer_path)
+        # the eager Keras model only accepts MAX_LEN inputs, so buckets need the graph path
+        self.length_buckets = tuple(sorted({b for b in length_buckets if 0 < b < self.MAX_LEN} | {self.MAX_LEN})) \
+            if graph_inference else (self.MAX_LEN,)
+        # training keeps the eager Keras model; inference goes through traced graphs
+        self.serve_fns = inference_fn_builder(self.bert_model, self.loaded_model.layers[-1], self.length_buckets) if graph_inference else {}
 
     def convert_emoji(self, text_):
         try:
@@ -60,26 +83,66 @@ class BertModel(BaseModel):
         except Exception:
             return text_
 
-    def tokenize_2(self, data):
-        input_id = []
-        attention_mask = []
-        for i in range(len(data)):
-            encode = self.tokenizer.encode_plus(
-                data[i], max_length=self.MAX_LEN, add_special_tokens=True,
-                padding='max_length', return_attention_mask=True
-            )
-            input_id.append(encode["input_ids"])
-            attention_mask.append(encode["attention_mask"])
-        return np.array(input_id), np.array(attention_mask)
+    def bucket_length(self, length):
+        for bucket in self.length_buckets:
+            if length <= bucket:
+                return bucket
+        return self.MAX_LEN
 
-    def predict(self, chat_text: str):
+    def _encode(self, data):
+        return self.tokenizer(
+            list(data), max_length=self.MAX_LEN, truncation=True, add_special_tokens=True,
+            padding=False, return_attention_mask=False
+        )["input_ids"]
+
+    def _pad(self, encoded, width):
+        input_id = np.full((len(encoded), width), self.tokenizer.pad_token_id, dtype=np.int32)
+        attention_mask = np.zeros((len(encoded), width), dtype=np.int32)
+        for i, ids in enumerate(encoded):
+            input_id[i, :len(ids)] = ids
+            attention_mask[i, :len(ids)] = 1
+        return input_id, attention_mask
+
+    def tokenize_2(self, data, pad_to=None):
+        encoded = self._encode(data)
+        width = pad_to or self.bucket_length(max((len(ids) for ids in encoded), default=0))
+        return self._pad(encoded, width)
+
+    def tokenize_bucketed(self, data):
+        encoded = self._encode(data)
+        groups = {}
+        for i, ids in enumerate(encoded):
+            groups.setdefault(self.bucket_length(len(ids)), []).append(i)
+        for width, indices in sorted(groups.items()):
+            txt_, txt_mask = self._pad([encoded[i] for i in indices], width)
+            yield indices, txt_, txt_mask
+
+    def normalize(self, chat_text: str):
+        if isinstance(chat_text, NormalizedText):
+            return chat_text
         chat_text = self.clean_text(chat_text)
         chat_text = self.convert_emoji(chat_text)
         chat_text = word_tokenize(chat_text)
         chat_text = [self.lametizer.lemmatize(token) for token in chat_text]
-        chat_text = " ".join(chat_text)
-        txt_, txt_mask = self.tokenize_2([chat_text])
-        text_clf = self.loaded_model.predict([txt_, txt_mask])
-        y_pred_raveled = text_clf.ravel()[:3]
-        predicted_class = np.argmax(y_pred_raveled)
-        return list((y_pred_raveled, predicted_class))
\ No newline at end of file
+        return NormalizedText(" ".join(chat_text))
+
+    def forward(self, txt_, txt_mask, eager=False):
+        serve_fn = self.serve_fns.get(txt_.shape[1])
+        if eager or serve_fn is None:
+            return self.loaded_model.predict([txt_, txt_mask])
+        out = serve_fn(tf.constant(txt_, dtype=tf.int32), tf.constant(txt_mask, dtype=tf.int32))
+        return out.numpy()
+
+    def predict_batch(self, texts):
+        if not texts:
+            return []
+        results = [None] * len(texts)
+        for indices, txt_, txt_mask in self.tokenize_bucketed([self.normalize(t) for t in texts]):
+            text_clf = self.forward(txt_, txt_mask)
+            for i, row in zip(indices, text_clf):
+                y_pred_raveled = row.ravel()[:3]
+                results[i] = list((y_pred_raveled, np.argmax(y_pred_raveled)))
+        return results
+
+    def predict(self, chat_text: str):
+        return self.predict_batch([chat_text])[0]
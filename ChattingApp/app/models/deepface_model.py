@@ -1,5 +1,9 @@
+import cv2
+import numpy as np
 from app.models.base_model import BaseModel
 from deepface import DeepFace
+from deepface.models.demography import Emotion
+from deepface.modules import preprocessing
 
 class DeepFaceModel(BaseModel):
     def __init__(self):
@@ -12,4 +16,39 @@ class DeepFaceModel(BaseModel):
             emotion = emotion_predictions[0]['emotion']
         else:
             emotion = emotion_predictions['emotion']
-        return emotion
\ No newline at end of file
+        return emotion
+
+def extract_face(frame_bgr):
+    # 1) spróbuj dokładniej (mediapipe + enforce)
+    try:
+        faces = DeepFace.extract_faces(frame_bgr, detector_backend='mediapipe', enforce_detection=True)
+    except Exception:
+        # 2) fallback (opencv + bez enforce) – zapobiegnie wyjątkom, ale może dać bazowy rozkład
+        faces = DeepFace.extract_faces(frame_bgr, detector_backend='opencv', enforce_detection=False)
+    return faces[0]
+
+class DeepFaceEmotionModel(BaseModel):
+    # DeepFace's facial-expression CNN applied directly to detected face crops,
+    # so crops from many users can share one forward pass
+    def __init__(self):
+        self.model = DeepFace.build_model(model_name="Emotion", task="facial_attribute").model
+
+    def preprocess(self, face):
+        # same steps DeepFace.analyze applies: RGB crop -> BGR, letterbox to 224, gray, 48x48
+        img = preprocessing.resize_image(img=face[:, :, ::-1], target_size=(224, 224))[0]
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, (48, 48))
+
+    def predict_batch(self, faces):
+        if not faces:
+            return []
+        batch = np.stack([self.preprocess(face) for face in faces])[..., np.newaxis]
+        predictions = self.model(batch, training=False).numpy()
+        emotions = []
+        for row in predictions:
+            total = row.sum()
+            emotions.append({label: float(100 * row[i] / total) for i, label in enumerate(Emotion.labels)})
+        return emotions
+
+    def predict(self, face):
+        return self.predict_batch([face])[0]
@@ -0,0 +1,48 @@
+import re
+import numpy as np
+from afinn import Afinn
+
+from app.models.base_model import BaseModel
+
+class LexiconModel(BaseModel):
+    """AFINN word-score sentiment in the same [neg, neu, pos] format as BertModel.
+
+    Word negativity is mapped the same way as /api/sentiment/score_words
+    (clip(-score / 5, 0, 1)); a text takes its strongest negative and positive word.
+    """
+
+    def __init__(self, lexicon=None, wordlist: str = "AFINN-en-165.txt"):
+        if lexicon is None:
+            afinn = Afinn()
+            lexicon = afinn.read_word_file(afinn.full_filename(wordlist))
+        # single words only; AFINN multi-word phrases need the regex matcher
+        self.lexicon = {w: float(s) for w, s in lexicon.items() if " " not in w}
+        self._word_re = re.compile(r"[a-z']+")
+
+    def predict_batch(self, texts):
+        return [pred for pred, _ in self.predict_batch_with_hits(texts)]
+
+    def predict_batch_with_hits(self, texts):
+        # -> [(prediction, number of lexicon words found)]; 0 hits means the lexicon knows nothing about the text
+        if not texts:
+            return []
+        words = [self._word_re.findall((t or "").lower()) for t in texts]
+        scores = np.fromiter((self.lexicon.get(w, 0.0) for ws in words for w in ws), dtype=np.float32)
+        owner = np.repeat(np.arange(len(texts)), [len(ws) for ws in words])
+        hits = np.bincount(owner[scores != 0], minlength=len(texts))
+
+        neg = np.zeros(len(texts), dtype=np.float32)
+        pos = np.zeros(len(texts), dtype=np.float32)
+        np.maximum.at(neg, owner, np.where(scores < 0, np.minimum(-scores / 5.0, 1.0), 0.0))
+        np.maximum.at(pos, owner, np.where(scores > 0, np.minimum(scores / 5.0, 1.0), 0.0))
+        neu = 1.0 - np.maximum(neg, pos)
+
+        probs = np.stack([neg, neu, pos], axis=1)
+        probs /= probs.sum(axis=1, keepdims=True)
+        return [(list((row, np.argmax(row))), int(n)) for row, n in zip(probs, hits)]
+
+    def predict(self, text):
+        return self.predict_batch([text])[0]
+
+    def predict_with_hits(self, text):
+        return self.predict_batch_with_hits([text])[0]
@@ -6,7 +6,9 @@ class ModelFactory:
     @staticmethod
     def create_model(model_type):
         if model_type == "bert":
-            return BertModel(Config.MODEL_PATH, Config.TOKENIZER_PATH)
+            return BertModel(Config.MODEL_PATH, Config.TOKENIZER_PATH,
+                             graph_inference=Config.BERT_GRAPH_INFERENCE,
+                             length_buckets=Config.BERT_LENGTH_BUCKETS)
         elif model_type == "deepface":
             return DeepFaceModel()
         else:
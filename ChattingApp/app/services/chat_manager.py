@@ -1,33 +1,40 @@
 from datetime import datetime
+import threading
+from app.services.state_backend import InMemoryStateBackend
 
 class ChatManager:
-    def __init__(self):
-        self.active_sessions = {}
-        self.user_sessions = {}
+    def __init__(self, state=None):
+        state = state or InMemoryStateBackend()
+        self.active_sessions = state.map("chat_sessions")  # session_id -> ChatSession.to_dict()
+        self.user_sessions = state.map("user_sessions")
+        # socket handlers and the SessionRegistry sweeper both change the maps
+        self._lock = threading.RLock()
     
     def create_session(self, user1_id, user1_name, user2_id, user2_name):
         session_id = f"{min(user1_id, user2_id)}_{max(user1_id, user2_id)}"
-        
-        if session_id not in self.active_sessions:
-            session = ChatSession(
-                session_id=session_id,
-                user1_id=user1_id,
-                user1_name=user1_name,
-                user2_id=user2_id,
-                user2_name=user2_name
-            )
-            
-            self.active_sessions[session_id] = session
-            self.user_sessions[user1_id] = session_id
-            self.user_sessions[user2_id] = session_id
-            
-            print(f"Created session: {user1_name} ↔ {user2_name} (ID: {session_id})")
-        
-        return self.active_sessions[session_id]
-    
+        with self._lock:
+            if session_id not in self.active_sessions:
+                session = ChatSession(
+                    session_id=session_id,
+                    user1_id=user1_id,
+                    user1_name=user1_name,
+                    user2_id=user2_id,
+                    user2_name=user2_name
+                )
+
+                self.active_sessions[session_id] = session.to_dict()
+                self.user_sessions[user1_id] = session_id
+                self.user_sessions[user2_id] = session_id
+
+                print(f"Created session: {user1_name} ↔ {user2_name} (ID: {session_id})")
+                return session
+
+            return ChatSession.from_dict(self.active_sessions[session_id])
+
     def get_session_by_user(self, user_id):
         session_id = self.user_sessions.get(user_id)
-        return self.active_sessions.get(session_id)
+        data = self.active_sessions.get(session_id) if session_id else None
+        return ChatSession.from_dict(data) if data else None
     
     def get_partner_id(self, user_id):
         session = self.get_session_by_user(user_id)
@@ -35,6 +42,16 @@ class ChatManager:
             return session.get_partner_id(user_id)
         return None
 
+    def release_user(self, user_id):
+        with self._lock:
+            session_id = self.user_sessions.pop(user_id, None)
+            if session_id and session_id not in self.user_sessions.values():
+                self.active_sessions.pop(session_id, None)
+
+    def counts(self):
+        with self._lock:
+            return {"active_sessions": len(self.active_sessions), "user_sessions": len(self.user_sessions)}
+
 class ChatSession:
     def __init__(self, session_id, user1_id, user1_name, user2_id, user2_name):
         self.session_id = session_id
@@ -59,6 +76,22 @@ class ChatSession:
             return self.user1_name
         return None
     
+    def to_dict(self):
+        return {
+            'session_id': self.session_id,
+            'user1_id': self.user1_id,
+            'user1_name': self.user1_name,
+            'user2_id': self.user2_id,
+            'user2_name': self.user2_name,
+            'created_at': self.created_at.isoformat(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        session = cls(data['session_id'], data['user1_id'], data['user1_name'], data['user2_id'], data['user2_name'])
+        session.created_at = datetime.fromisoformat(data['created_at'])
+        return session
+
     def add_message(self, sender_id, message, timestamp):
         self.messages.append({
             'sender_id': sender_id,
@@ -0,0 +1,59 @@
+import threading
+import time
+
+
+class CircuitBreaker:
+    """Stops calling a backend that keeps failing.
+
+    After `failures` consecutive failures the breaker opens and `allow` answers False
+    for `cooldown_s`. Then it is half-open: one trial call is let through, and its
+    outcome closes the breaker again or reopens it for another cooldown. A trial that
+    has not reported back after another `cooldown_s` (a hung call) is given up on and
+    the next call becomes the new trial.
+    """
+
+    def __init__(self, failures: int = 3, cooldown_s: float = 30.0):
+        self.failures = max(1, int(failures))
+        self.cooldown_s = cooldown_s
+        self.state = "closed"
+        self._consecutive = 0
+        self._opened_at = 0.0
+        self._trial_at = 0.0
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.rejected = 0
+
+    def allow(self, now: float | None = None) -> bool:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and now - self._opened_at >= self.cooldown_s:
+                self.state = "half_open"
+                self._trial_at = now
+                return True
+            if self.state == "half_open" and now - self._trial_at >= self.cooldown_s:
+                self._trial_at = now
+                return True
+            self.rejected += 1
+            return False
+
+    def success(self):
+        with self._lock:
+            self.state = "closed"
+            self._consecutive = 0
+
+    def failure(self, now: float | None = None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._consecutive += 1
+            if self.state == "half_open" or self._consecutive >= self.failures:
+                if self.state != "open":
+                    self.opened += 1
+                self.state = "open"
+                self._opened_at = now
+
+    def stats(self):
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self._consecutive,
+                    "opened": self.opened, "rejected": self.rejected}
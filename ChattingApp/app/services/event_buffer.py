@@ -0,0 +1,115 @@
+import sys
+from array import array
+from datetime import datetime, timedelta
+
+import numpy as np
+
+
+def format_timestamp_ms(ms: int) -> str:
+    # local time, millisecond precision: the format Logger rows always had
+    dt = datetime.fromtimestamp(ms // 1000) + timedelta(milliseconds=ms % 1000)
+    return dt.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+
+class EventBuffer:
+    """Column-oriented storage for session log rows.
+
+    Float columns (emotions, sentiment) live in preallocated float64 arrays that grow
+    by doubling, with NaN for "not set". Every other column is a sparse {row: value}
+    dict, so the many columns a row leaves empty cost nothing, and string values of
+    `intern_columns` are interned. Timestamps are int epoch milliseconds and only
+    turned into strings by `to_dataframe`. Columns outside the schema are kept too and
+    exported after it, in first-seen order, like a DataFrame built from row dicts.
+    """
+
+    def __init__(self, columns, float_columns=(), intern_columns=(), time_column: str = "timestamp",
+                 capacity: int = 256):
+        self.columns = list(columns)
+        self.time_column = time_column
+        self._intern = frozenset(intern_columns)
+        self._capacity = max(1, int(capacity))
+        float_columns = set(float_columns)
+        self._floats = {c: np.full(self._capacity, np.nan) for c in self.columns if c in float_columns}
+        self._objects = {c: {} for c in self.columns if c not in float_columns and c != time_column}
+        self._timestamps = array('q')
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def new_row(self, ts_ms: int) -> int:
+        if self._size == self._capacity:
+            self._capacity *= 2
+            for col, values in self._floats.items():
+                grown = np.full(self._capacity, np.nan)
+                grown[:self._size] = values[:self._size]
+                self._floats[col] = grown
+        self._timestamps.append(ts_ms)
+        self._size += 1
+        return self._size - 1
+
+    def set(self, row: int, col: str, value):
+        values = self._floats.get(col)
+        if values is not None:
+            try:
+                values[row] = np.nan if value is None else value
+                return
+            except (TypeError, ValueError):
+                self._demote(col)
+        values = self._objects.get(col)
+        if values is None:
+            values = self._objects[col] = {}
+        if value is None:
+            values.pop(row, None)
+        else:
+            values[row] = sys.intern(value) if col in self._intern and type(value) is str else value
+
+    def _demote(self, col):
+        # a non-numeric value in a float column: keep the column as plain objects from now on
+        values = self._floats.pop(col)[:self._size]
+        self._objects[col] = {i: float(v) for i, v in enumerate(values) if not np.isnan(v)}
+
+    def clear(self):
+        for values in self._floats.values():
+            values.fill(np.nan)
+        for col in self._objects:
+            self._objects[col] = {}
+        self._timestamps = array('q')
+        self._size = 0
+
+    def nbytes(self):
+        # rough footprint of the stored data (arrays + sparse dicts, not the objects they point to)
+        return (sum(v.nbytes for v in self._floats.values()) + self._timestamps.itemsize * len(self._timestamps)
+                + sum(sys.getsizeof(d) for d in self._objects.values()))
+
+    def rows(self):
+        # -> (column names, row tuples) with formatted timestamps and None for unset cells
+        n = self._size
+        columns = self.columns + [c for c in self._objects if c not in self.columns]
+        data = []
+        for col in columns:
+            if col == self.time_column:
+                data.append([format_timestamp_ms(ms) for ms in self._timestamps])
+            elif col in self._floats:
+                data.append([None if np.isnan(v) else v for v in self._floats[col][:n].tolist()])
+            else:
+                values = self._objects[col]
+                data.append([values.get(i) for i in range(n)])
+        return columns, list(zip(*data))
+
+    def to_dataframe(self):
+        import pandas as pd
+        n = self._size
+        extras = [c for c in self._objects if c not in self.columns]
+        data = {}
+        for col in self.columns + extras:
+            if col == self.time_column:
+                data[col] = [format_timestamp_ms(ms) for ms in self._timestamps]
+            elif col in self._floats:
+                values = self._floats[col][:n]
+                # never set at all: empty cells, as a column of None
+                data[col] = values.copy() if not np.isnan(values).all() else [None] * n
+            else:
+                values = self._objects[col]
+                data[col] = [values.get(i) for i in range(n)]
+        return pd.DataFrame(data, columns=self.columns + extras)
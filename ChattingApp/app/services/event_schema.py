@@ -0,0 +1,90 @@
+from app.services.logger import EMOTIONS
+
+# shared fields a partner's row mirrors as partner_<field>
+_MIRRORED = (
+    'message', 'complete_message', 'warnings_count', 'corrections_count',
+    'start_sending_time', 'end_sending_time', 'total_sending_time',
+    'start_viewing_time', 'end_viewing_time', 'total_viewing_time',
+)
+_SENTIMENT = (('neg', 'sentiment_neg'), ('pos', 'sentiment_pos'), ('neu', 'sentiment_neu'))
+
+
+def _partner_cols(pairs):
+    return tuple((src, f'partner_{col}') for src, col in pairs)
+
+
+class ChatEventSchema:
+    """LoggerManager.log_chat_event compiled to column writes.
+
+    Every (source field -> column) pair both rows need is resolved once here; `fill_user`
+    and `fill_partner` then write one event's values straight into each logger's
+    EventBuffer with no intermediate row dicts. Write order (and so which value wins
+    when two sources hit the same column) is the order the old row dicts merged in.
+    """
+
+    def __init__(self):
+        self.mirrored = tuple((f, f'partner_{f}') for f in _MIRRORED)
+        self.emotions = tuple((e, f'partner_{e}') for e in EMOTIONS)
+        self.sentiment = _SENTIMENT
+        self.partner_sentiment = _partner_cols(_SENTIMENT)
+        self.receiver_only = frozenset(('message', 'complete_message'))
+
+    def fill_user(self, events, row, logger, user_id, status, emotions, fields, skip,
+                  user_sent, partner_id, partner_name, partner_status, partner_sent):
+        set_ = events.set
+        receiver = status == 'receiver'
+        for k, v in fields.items():
+            if k.startswith('partner_') or k == 'timestamp' or k in skip or (receiver and k in self.receiver_only):
+                continue
+            set_(row, k, v)
+        if 'user_id' not in fields:
+            set_(row, 'user_id', user_id)
+        if 'status' not in fields:
+            set_(row, 'status', status)
+        if user_sent:
+            for src, col in self.sentiment:
+                set_(row, col, user_sent.get(src, 0))
+        set_(row, 'username', logger.username)
+        for e in EMOTIONS:
+            set_(row, e, emotions.get(e, 0))
+        set_(row, 'partner_name', logger.partnername)
+        if not partner_id:
+            return
+        mirrored = (
+            ('partner_name', partner_name),
+            ('partner_status', partner_status),
+            ('partner_message', fields.get('partner_message', fields.get('message', '') if receiver else '')),
+            ('partner_complete_message',
+             fields.get('partner_complete_message', fields.get('complete_message', '') if receiver else '')),
+            ('partner_warnings_count', fields.get('partner_warnings_count')),
+            ('partner_corrections_count', fields.get('partner_corrections_count')),
+        )
+        for col, v in mirrored:
+            if v is not None and v != '':
+                set_(row, col, v)
+        if partner_sent:
+            for src, col in self.partner_sentiment:
+                set_(row, col, partner_sent.get(src, 0))
+
+    def fill_partner(self, events, row, logger, partner_id, partner_status, status, emotions, fields,
+                     user_name, user_sent):
+        set_ = events.set
+        set_(row, 'user_id', partner_id)
+        set_(row, 'status', partner_status)
+        set_(row, 'username', logger.username)
+        for e in EMOTIONS:
+            set_(row, e, 0)
+        set_(row, 'partner_name', logger.partnername)
+        if user_name:
+            set_(row, 'partner_name', user_name)
+        if status:
+            set_(row, 'partner_status', status)
+        for src, col in self.mirrored:
+            v = fields.get(src)
+            if v is not None and v != '':
+                set_(row, col, v)
+        for src, col in self.emotions:
+            set_(row, col, emotions.get(src, 0))
+        if user_sent:
+            for src, col in self.partner_sentiment:
+                set_(row, col, user_sent.get(src, 0))
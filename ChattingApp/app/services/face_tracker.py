@@ -0,0 +1,118 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class TrackingStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.detected = 0
+        self.tracked = 0
+        self.detect_time_s = 0.0
+        self.track_time_s = 0.0
+
+    def record(self, tracked: bool, elapsed_s: float):
+        with self._lock:
+            if tracked:
+                self.tracked += 1
+                self.track_time_s += elapsed_s
+            else:
+                self.detected += 1
+                self.detect_time_s += elapsed_s
+
+    def stats(self):
+        with self._lock:
+            frames = self.detected + self.tracked
+            detect_ms = self.detect_time_s / self.detected * 1000.0 if self.detected else 0.0
+            track_ms = self.track_time_s / self.tracked * 1000.0 if self.tracked else 0.0
+            return {
+                "frames": frames,
+                "detections": self.detected,
+                "detections_skipped": self.tracked,
+                "skip_rate": self.tracked / frames if frames else 0.0,
+                "avg_detect_ms": detect_ms,
+                "avg_track_ms": track_ms,
+                # what the skipped frames would have cost at the average detection time
+                "est_saved_ms_per_frame": (self.tracked * (detect_ms - track_ms) / frames) if frames and self.detected else 0.0,
+            }
+
+
+class FaceTracker:
+    """Reuses each user's last detected face box instead of running the detector every frame.
+
+    A track is dropped, and the caller runs detection again, after `redetect_every`
+    reused frames or when the crop under the box no longer looks like the face that was
+    detected there (normalized cross-correlation of small gray templates).
+    """
+
+    def __init__(self, redetect_every: int = 5, min_similarity: float = 0.7, template_size: int = 24):
+        self.redetect_every = max(0, int(redetect_every))
+        self.min_similarity = min_similarity
+        self.template_size = template_size
+        self._tracks = {}  # key -> {"box": (x, y, w, h), "template": ndarray, "age": int}
+        self._lock = threading.Lock()
+        self.lost = 0
+
+    def _template(self, crop):
+        gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+        t = cv2.resize(gray, (self.template_size, self.template_size), interpolation=cv2.INTER_AREA).astype(np.float32)
+        t -= t.mean()
+        norm = np.linalg.norm(t)
+        return t / norm if norm > 0 else t
+
+    def track(self, key, image):
+        # -> the tracked (x, y, w, h) box if it still holds the face, else None
+        with self._lock:
+            track = self._tracks.get(key)
+            if track is None or track["age"] >= self.redetect_every:
+                return None
+            x, y, w, h = track["box"]
+        crop = image[y:y + h, x:x + w]
+        if crop.size == 0 or float(np.sum(self._template(crop) * track["template"])) < self.min_similarity:
+            with self._lock:
+                self._tracks.pop(key, None)
+                self.lost += 1
+            return None
+        with self._lock:
+            track["age"] += 1
+        return x, y, w, h
+
+    def update(self, key, image, face_obj):
+        area = face_obj.get("facial_area") or {}
+        x, y, w, h = (int(area.get(k, 0)) for k in ("x", "y", "w", "h"))
+        # a fallback "face" covering the whole frame (confidence 0) is not worth tracking
+        if not face_obj.get("confidence") or w <= 0 or h <= 0:
+            self.drop(key)
+            return
+        template = self._template(image[y:y + h, x:x + w])
+        with self._lock:
+            self._tracks[key] = {"box": (x, y, w, h), "template": template, "age": 0}
+
+    def box(self, key):
+        # -> the (x, y, w, h) face box currently tracked for key, or None
+        with self._lock:
+            track = self._tracks.get(key)
+            return track["box"] if track is not None else None
+
+    def get_face(self, key, frame, detect):
+        # frame: DecodedFrame; -> (face crop, whether detection was skipped, seconds spent finding the face)
+        start = time.perf_counter()
+        box = self.track(key, frame.image) if key is not None else None
+        tracked = box is not None
+        if tracked:
+            face = frame.face_crop(*box)
+        else:
+            face_obj = detect(frame.image)
+            if key is not None:
+                self.update(key, frame.image, face_obj)
+            area = face_obj.get("facial_area") or {}
+            box = tuple(int(area.get(k, 0)) for k in ("x", "y", "w", "h"))
+            # small face in a reduced-scale decode: take the crop from full resolution instead
+            face = frame.face_crop(*box) if face_obj.get("confidence") and frame.needs_full(*box[2:]) else face_obj["face"]
+        return face, tracked, time.perf_counter() - start
+
+    def drop(self, key):
+        with self._lock:
+            self._tracks.pop(key, None)
@@ -0,0 +1,53 @@
+import cv2
+import numpy as np
+
+_REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+class DecodedFrame:
+    """A BGR frame for detection/tracking, decoded from JPEG at 1/scale (libjpeg DCT scaling).
+
+    The full-resolution image is decoded only when a face is smaller than `min_face_px`
+    in the reduced image (the emotion model wants a 48x48 input), and only the face
+    ROI is ever converted to RGB.
+    """
+
+    def __init__(self, image, jpeg=None, scale: int = 1, min_face_px: int = 48):
+        self.image = image
+        self.scale = scale
+        self.min_face_px = min_face_px
+        self._jpeg = jpeg
+        self._full = image if scale == 1 else None
+
+    @classmethod
+    def decode(cls, jpeg, scale: int = 2, min_face_px: int = 48):
+        if scale not in _REDUCED_FLAGS:
+            raise ValueError(f"decode scale must be one of {sorted(_REDUCED_FLAGS)}, got {scale}")
+        jpeg = np.frombuffer(jpeg, dtype=np.uint8)
+        image = cv2.imdecode(jpeg, _REDUCED_FLAGS[scale])
+        if image is None:
+            return None
+        return cls(image, jpeg, scale, min_face_px)
+
+    @property
+    def full(self):
+        if self._full is None:
+            self._full = cv2.imdecode(self._jpeg, cv2.IMREAD_COLOR)
+        return self._full
+
+    def needs_full(self, w, h):
+        return self.scale > 1 and self._jpeg is not None and min(w, h) < self.min_face_px
+
+    def face_crop(self, x, y, w, h):
+        # box in self.image coordinates -> RGB float crop in [0, 1], the layout DeepFace.extract_faces returns
+        if self.needs_full(w, h):
+            s = self.scale
+            roi = self.full[y * s:(y + h) * s, x * s:(x + w) * s]
+        else:
+            roi = self.image[y:y + h, x:x + w]
+        return roi[:, :, ::-1] / 255
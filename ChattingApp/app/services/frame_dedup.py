@@ -0,0 +1,89 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+def average_hash(frame, hash_size: int = 8) -> int:
+    # shrink first so the gray conversion and mean only touch hash_size**2 pixels
+    small = cv2.resize(frame, (hash_size, hash_size), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    bits = (small > small.mean()).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+class FrameDeduplicator:
+    """Remembers each user's last analysed face as an average hash plus its emotion result.
+
+    A new frame whose hash is within `max_distance` bits of the remembered one gets
+    the remembered result back, so a user sitting still in front of the camera does
+    not cost a detection or an emotion pass per frame. Only the face box the last
+    analysis found is hashed (the whole frame when there was none), so a face changing
+    expression against a still background is not mistaken for a repeat. A result is
+    reused at most `max_reuse` times and for `max_age_s` seconds before the frame is
+    analysed again anyway.
+    """
+
+    def __init__(self, max_distance: int = 4, hash_size: int = 8, max_reuse: int = 10, max_age_s: float = 2.0):
+        self.max_distance = max_distance
+        self.hash_size = hash_size
+        self.max_reuse = max_reuse
+        self.max_age_s = max_age_s
+        self._last = {}  # key -> {"hash", "result", "box", "at", "reused"}
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.reused = 0
+        self.expired = 0
+
+    def _hash(self, frame, box):
+        if box is not None:
+            x, y, w, h = box
+            crop = frame[max(y, 0):y + h, max(x, 0):x + w]
+            if crop.size:
+                frame = crop
+        return average_hash(frame, self.hash_size)
+
+    def lookup(self, key, frame, now: float | None = None):
+        # -> the remembered result, or None when the frame has to be analysed
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self.frames += 1
+            last = self._last.get(key)
+        if last is None:
+            return None
+        h = self._hash(frame, last["box"])
+        with self._lock:
+            if (h ^ last["hash"]).bit_count() > self.max_distance:
+                return None
+            if last["reused"] >= self.max_reuse or now - last["at"] >= self.max_age_s:
+                self.expired += 1
+                return None
+            last["reused"] += 1
+            self.reused += 1
+            return last["result"]
+
+    def remember(self, key, frame, result, box=None, now: float | None = None):
+        # box: (x, y, w, h) of the face in `frame`, None when no face was found
+        entry = {"hash": self._hash(frame, box), "result": result, "box": box,
+                 "at": time.monotonic() if now is None else now, "reused": 0}
+        with self._lock:
+            self._last[key] = entry
+
+    def drop(self, key):
+        with self._lock:
+            self._last.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "frames": self.frames,
+                "reused": self.reused,
+                "expired": self.expired,
+                "skip_rate": self.reused / self.frames if self.frames else 0.0,
+                "max_distance": self.max_distance,
+                "max_reuse": self.max_reuse,
+                "max_age_s": self.max_age_s,
+                "tracked_users": len(self._last),
+            }
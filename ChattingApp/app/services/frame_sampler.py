@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import deque
+
+
+class AdaptiveFrameSampler:
+    """Per-user frame interval that follows how far behind frame analysis is.
+
+    When more than `max_in_flight` frames are being analysed at once, or the p95 of the
+    recent analysis latencies is above `target_p95_ms`, the interval of the user whose
+    frame just finished is multiplied by `backoff`. With spare capacity (queue under
+    half the limit, p95 under half the target) it shrinks by `recover_s` per frame,
+    down to `min_interval_s`. Back off fast, recover slowly.
+    """
+
+    def __init__(self, min_interval_s: float = 0.4, max_interval_s: float = 3.0, target_p95_ms: float = 250.0,
+                 max_in_flight: int = 8, backoff: float = 1.5, recover_s: float = 0.05, window: int = 100):
+        self.min_interval_s = min_interval_s
+        self.max_interval_s = max(min_interval_s, max_interval_s)
+        self.target_p95_s = target_p95_ms / 1000.0
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.backoff = backoff
+        self.recover_s = recover_s
+        self._latencies = deque(maxlen=window)
+        self._users = {}  # key -> {"interval": s, "last": ts, "announced": s}
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self.accepted = 0
+        self.dropped = 0
+
+    def _user(self, key):
+        user = self._users.get(key)
+        if user is None:
+            user = self._users[key] = {"interval": self.min_interval_s, "last": 0.0, "announced": self.min_interval_s}
+        return user
+
+    def interval(self, key) -> float:
+        with self._lock:
+            return self._user(key)["interval"]
+
+    def allow(self, key, now: float | None = None) -> bool:
+        now = time.time() if now is None else now
+        with self._lock:
+            user = self._user(key)
+            # 10% slack so client timer jitter does not drop every other frame
+            if now - user["last"] < user["interval"] * 0.9:
+                self.dropped += 1
+                return False
+            user["last"] = now
+            self.accepted += 1
+            self._in_flight += 1
+            return True
+
+    def done(self, key, elapsed_s: float):
+        # -> the user's new interval when it moved enough to tell the client, else None
+        with self._lock:
+            self._in_flight -= 1
+            self._latencies.append(elapsed_s)
+            p95 = self._p95()
+            user = self._users.get(key)
+            if user is None:
+                return None
+            if self._in_flight >= self.max_in_flight or p95 > self.target_p95_s:
+                user["interval"] = min(self.max_interval_s, user["interval"] * self.backoff)
+            elif self._in_flight < self.max_in_flight / 2 and p95 < self.target_p95_s / 2:
+                user["interval"] = max(self.min_interval_s, user["interval"] - self.recover_s)
+            if abs(user["interval"] - user["announced"]) >= 0.1 * user["announced"]:
+                user["announced"] = user["interval"]
+                return user["interval"]
+            return None
+
+    def _p95(self):
+        if not self._latencies:
+            return 0.0
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def drop(self, key):
+        with self._lock:
+            self._users.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            frames = self.accepted + self.dropped
+            return {
+                "in_flight": self._in_flight,
+                "p95_latency_ms": self._p95() * 1000.0,
+                "target_p95_ms": self.target_p95_s * 1000.0,
+                "accepted": self.accepted,
+                "dropped": self.dropped,
+                "drop_rate": self.dropped / frames if frames else 0.0,
+                "interval_ms": {str(k): round(u["interval"] * 1000.0) for k, u in self._users.items()},
+            }
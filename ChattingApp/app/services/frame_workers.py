@@ -0,0 +1,246 @@
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from app.services.face_tracker import TrackingStats
+
+
+def _worker_main(index, shm_name, slot_bytes, tasks, results, max_batch, redetect_every, min_similarity):
+    # runs in a spawned process: loads its own detector + emotion model once
+    from app.models.deepface_model import DeepFaceEmotionModel, extract_face
+    from app.services.face_tracker import FaceTracker
+    from app.services.frame_decode import DecodedFrame
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    model = DeepFaceEmotionModel()
+    # frames of one user always come to the same worker, so its face tracks live here
+    tracker = FaceTracker(redetect_every, min_similarity)
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                return
+            batch = [task]
+            # take whatever else is already queued so the emotion pass is batched
+            while len(batch) < max_batch:
+                try:
+                    task = tasks.get_nowait()
+                except queue.Empty:
+                    break
+                if task is None:
+                    tasks.put(None)
+                    break
+                batch.append(task)
+
+            faces, done = [], []
+            for job_id, slot, shape, key in batch:
+                frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+                try:
+                    face, tracked, elapsed = tracker.get_face(key, DecodedFrame(frame), extract_face)
+                    faces.append(face)
+                    done.append((job_id, slot, tracked, elapsed, tracker.box(key)))
+                except Exception as e:
+                    results.put((index, slot, job_id, None, str(e), False, 0.0, None))
+                del frame
+            if not faces:
+                continue
+            try:
+                emotions = model.predict_batch(faces)
+                for (job_id, slot, tracked, elapsed, box), emo in zip(done, emotions):
+                    results.put((index, slot, job_id, emo, None, tracked, elapsed, box))
+            except Exception as e:
+                for job_id, slot, _, _, _ in done:
+                    results.put((index, slot, job_id, None, str(e), False, 0.0, None))
+    finally:
+        shm.close()
+
+
+class _Worker:
+    def __init__(self, index, slots, slot_bytes):
+        self.index = index
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self.free_slots = list(range(slots))
+        self.in_flight = {}  # job_id -> slot
+        self.process = None
+        self.tasks = None
+        self.restarts = 0
+
+
+class FrameWorkerPool:
+    """Frame analysis (face detection + emotion) in N worker processes.
+
+    Each worker owns a shared-memory ring of frame slots: the server copies a decoded
+    frame into a free slot and sends only (job_id, slot, shape) over the task queue.
+    Results come back on one shared queue and resolve the caller's future. Frames
+    submitted with a key (user id) always go to the same worker so it can reuse that
+    user's face track instead of running the detector on every frame. Crashed
+    workers are restarted and their in-flight frames fail like a DeepFace error would.
+    When a worker has no free slot for `slot_wait_s`, the frame is dropped (`submit`
+    returns None) rather than holding up the socket handler.
+    """
+
+    def __init__(self, num_workers: int | None = None, slots_per_worker: int = 4,
+                 max_frame_shape=(720, 1280, 3), max_batch: int = 8,
+                 redetect_every: int = 5, min_similarity: float = 0.7, slot_wait_s: float = 0.05):
+        self.num_workers = num_workers if num_workers and num_workers > 0 else max(1, (os.cpu_count() or 2) - 1)
+        self.slot_bytes = int(np.prod(max_frame_shape))
+        self.max_batch = max(1, int(max_batch))
+        self.redetect_every = redetect_every
+        self.min_similarity = min_similarity
+        self.slot_wait_s = slot_wait_s
+        self.tracking = TrackingStats()
+        self._ctx = mp.get_context("spawn")  # TensorFlow is not fork-safe
+        self._results = self._ctx.Queue()
+        self._cond = threading.Condition()
+        self._futures = {}
+        self._next_job = 0
+        self._closing = False
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+
+        self._workers = [_Worker(i, slots_per_worker, self.slot_bytes) for i in range(self.num_workers)]
+        for worker in self._workers:
+            self._start(worker)
+
+        self._listener = threading.Thread(target=self._listen, name="frame-results", daemon=True)
+        self._listener.start()
+        self._monitor = threading.Thread(target=self._watch, name="frame-workers-monitor", daemon=True)
+        self._monitor.start()
+
+    def _start(self, worker):
+        worker.tasks = self._ctx.Queue()
+        worker.process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker.index, worker.shm.name, self.slot_bytes, worker.tasks, self._results, self.max_batch,
+                  self.redetect_every, self.min_similarity),
+            name=f"frame-worker-{worker.index}", daemon=True,
+        )
+        worker.process.start()
+
+    def submit(self, frame, key=None) -> Future | None:
+        # -> None when the frame was dropped because no slot freed up within slot_wait_s
+        if frame.dtype != np.uint8 or frame.nbytes > self.slot_bytes:
+            raise ValueError(f"frame {frame.shape} {frame.dtype} does not fit a {self.slot_bytes}-byte slot")
+        fut = Future()
+        deadline = time.monotonic() + self.slot_wait_s
+        with self._cond:
+            while True:
+                if self._closing:
+                    raise RuntimeError("FrameWorkerPool is closed")
+                if key is None:
+                    worker = max(self._workers, key=lambda w: len(w.free_slots))
+                else:
+                    worker = self._workers[hash(key) % self.num_workers]
+                if worker.free_slots:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.dropped += 1
+                    return None
+                self._cond.wait(remaining)
+            slot = worker.free_slots.pop()
+            job_id = self._next_job
+            self._next_job += 1
+            worker.in_flight[job_id] = slot
+            self._futures[job_id] = fut
+            view = np.ndarray(frame.shape, dtype=np.uint8, buffer=worker.shm.buf, offset=slot * self.slot_bytes)
+            view[...] = frame
+            del view
+            worker.tasks.put((job_id, slot, frame.shape, key))
+        return fut
+
+    def analyze(self, frame, key=None):
+        # -> emotion dict, or None for a dropped frame
+        return self.analyze_with_box(frame, key)[0]
+
+    def analyze_with_box(self, frame, key=None):
+        # -> (emotion dict or None when dropped, the face box the worker tracks for key or None)
+        fut = self.submit(frame, key)
+        if fut is None:
+            return None, None
+        return fut.result(), getattr(fut, "face_box", None)
+
+    def _release(self, worker, job_id):
+        slot = worker.in_flight.pop(job_id, None)
+        if slot is not None:
+            worker.free_slots.append(slot)
+            self._cond.notify()
+        return self._futures.pop(job_id, None)
+
+    def _listen(self):
+        while True:
+            item = self._results.get()
+            if item is None:
+                return
+            index, _, job_id, emo, err, tracked, elapsed, box = item
+            with self._cond:
+                fut = self._release(self._workers[index], job_id)
+                if err is None:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+            if err is None:
+                self.tracking.record(tracked, elapsed)
+            if fut is None:
+                continue
+            if err is None:
+                fut.face_box = box
+                fut.set_result(emo)
+            else:
+                fut.set_exception(RuntimeError(err))
+
+    def _watch(self):
+        while True:
+            time.sleep(1.0)
+            with self._cond:
+                if self._closing:
+                    return
+                for worker in self._workers:
+                    if worker.process.is_alive():
+                        continue
+                    print(f"[frames] worker {worker.index} exited ({worker.process.exitcode}); restarting")
+                    lost = [self._release(worker, job_id) for job_id in list(worker.in_flight)]
+                    self.failed += len(lost)
+                    for fut in lost:
+                        if fut is not None:
+                            fut.set_exception(RuntimeError("frame worker crashed"))
+                    worker.restarts += 1
+                    self._start(worker)
+
+    def close(self, timeout: float = 5.0):
+        with self._cond:
+            if self._closing:
+                return
+            self._closing = True
+            self._cond.notify_all()
+        for worker in self._workers:
+            worker.tasks.put(None)
+        for worker in self._workers:
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        self._results.put(None)
+        self._listener.join(timeout)
+        for worker in self._workers:
+            worker.shm.close()
+            worker.shm.unlink()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "workers": self.num_workers,
+                "alive": sum(w.process.is_alive() for w in self._workers),
+                "restarts": sum(w.restarts for w in self._workers),
+                "in_flight": sum(len(w.in_flight) for w in self._workers),
+                "free_slots": sum(len(w.free_slots) for w in self._workers),
+                "completed": self.completed,
+                "failed": self.failed,
+                "dropped": self.dropped,
+            }
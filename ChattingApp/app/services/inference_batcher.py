@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+
+class InferenceBatcher:
+    """Collects predict() calls from all socket handlers and runs them as one model.predict_batch() call.
+
+    A batch is closed when `max_batch_size` requests are queued or when the oldest
+    request has waited `batch_window_ms`, whichever comes first.
+    """
+
+    def __init__(self, model, max_batch_size: int = 32, batch_window_ms: float = 5.0, name: str = "bert-batcher"):
+        self.model = model
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.batch_window_s = max(0.0, float(batch_window_ms)) / 1000.0
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self._batches = 0
+        self._requests = 0
+        self._batch_sizes = Counter()
+        self._wait_total_s = 0.0
+        self._wait_max_s = 0.0
+
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, item) -> Future:
+        fut = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("InferenceBatcher is closed")
+            self._queue.append((item, time.perf_counter(), fut))
+            self._cond.notify()
+        return fut
+
+    def predict(self, item):
+        return self.submit(item).result()
+
+    def close(self, timeout: float | None = None):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join(timeout)
+
+    def _collect(self):
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if not self._queue:
+                return []
+            deadline = self._queue[0][1] + self.batch_window_s
+            while len(self._queue) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            size = min(len(self._queue), self.max_batch_size)
+            batch = [self._queue.popleft() for _ in range(size)]
+
+            started = time.perf_counter()
+            waits = [started - enqueued for _, enqueued, _ in batch]
+            self._batches += 1
+            self._requests += size
+            self._batch_sizes[size] += 1
+            self._wait_total_s += sum(waits)
+            self._wait_max_s = max(self._wait_max_s, max(waits))
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if not batch:
+                return
+            batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                results = list(self.model.predict_batch([item for item, _, _ in batch]))
+                if len(results) != len(batch):
+                    raise RuntimeError(f"predict_batch returned {len(results)} results for {len(batch)} inputs")
+            except Exception as e:
+                for _, _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            for (_, _, fut), res in zip(batch, results):
+                fut.set_result(res)
+
+    def stats(self):
+        with self._cond:
+            avg_size = self._requests / self._batches if self._batches else 0.0
+            return {
+                "batches": self._batches,
+                "requests": self._requests,
+                "queue_depth": len(self._queue),
+                "max_batch_size": self.max_batch_size,
+                "batch_window_ms": self.batch_window_s * 1000.0,
+                "avg_batch_size": avg_size,
+                "avg_batch_fill": avg_size / self.max_batch_size,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "avg_queue_wait_ms": (self._wait_total_s / self._requests * 1000.0) if self._requests else 0.0,
+                "max_queue_wait_ms": self._wait_max_s * 1000.0,
+            }
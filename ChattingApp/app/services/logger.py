@@ -1,9 +1,18 @@
+from collections import deque
 from datetime import datetime
 import os
+import queue
+import secrets
+import threading
+import time
+from app.services.event_buffer import EventBuffer
+from app.services.session_log import SessionLogWriter
+
+EMOTIONS = ('angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral')
+SENTIMENTS = ('sentiment_neg', 'sentiment_pos', 'sentiment_neu')
 
 class Logger:
-    def __init__(self):
-        self.frames = []
+    def __init__(self, flush_every: int = 500, flush_interval_s: float = 10.0, persistence=None):
         self.status = ""
         self.username = ""
         self.partnername = ""
@@ -30,34 +39,136 @@ class Logger:
 
             'partner_warnings_count', 'partner_corrections_count'
         ]
+        self.events = self._new_events()
+        # buffered events go to an append-only log under data/sessions/ every
+        # flush_every events or flush_interval_s seconds (flush_every <= 0: only on save).
+        # The full buffer is swapped out under the lock and written by `persistence`
+        # (a PersistenceQueue) without waiting for room in it, so logging threads never
+        # wait for the disk; only without a queue, or once it is closed, they write inline.
+        self.flush_every = flush_every
+        self.flush_interval_s = flush_interval_s
+        self.persistence = persistence
+        # the user name may not be known yet at the first flush; the Excel file carries it
+        self.session_name = f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{secrets.token_hex(4)}"
+        self.writer = None
+        self._flushed = 0
+        self._unwritten = deque()  # swapped-out EventBuffers not on disk yet, oldest first
+        self._unwritten_rows = 0
+        self._write_scheduled = False
+        self.deferred_writes = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._write_lock = threading.RLock()  # session log writes and the export
+
+    def __len__(self):
+        return self._flushed + self._unwritten_rows + len(self.events)
+
+    def _new_events(self):
+        return EventBuffer(
+            self.columns,
+            float_columns=[*EMOTIONS, *SENTIMENTS, *(f'partner_{c}' for c in (*EMOTIONS, *SENTIMENTS))],
+            intern_columns=('username', 'status', 'partner_name', 'partner_status'),
+        )
+
+    def _session_writer(self):
+        if self.writer is None:
+            self.writer = SessionLogWriter(os.path.join(os.getcwd(), "data", "sessions", self.session_name))
+        return self.writer
+
+    def _flush(self) -> bool:
+        # under self._lock: -> True when a buffer was swapped out and has to be written
+        self._last_flush = time.monotonic()
+        if not len(self.events):
+            return False
+        self._unwritten.append(self.events)
+        self._unwritten_rows += len(self.events)
+        self.events = self._new_events()
+        return True
+
+    def _write_unwritten(self):
+        with self._write_lock:
+            with self._lock:
+                self._write_scheduled = False
+            while True:
+                with self._lock:
+                    if not self._unwritten:
+                        return
+                    # only this (write-locked) loop removes buffers, so the head stays put
+                    events = self._unwritten[0]
+                columns, rows = events.rows()
+                self._session_writer().append(columns, rows)
+                with self._lock:
+                    self._unwritten.popleft()
+                    self._unwritten_rows -= len(rows)
+                    self._flushed += len(rows)
+
+    def _schedule_write(self):
+        if self.persistence is not None:
+            with self._lock:
+                if self._write_scheduled:
+                    return
+                self._write_scheduled = True
+            try:
+                self.persistence.submit(self._write_unwritten, block=False)
+                return
+            except queue.Full:
+                # queue busy with exports: the buffers wait in _unwritten for the next flush or the save
+                with self._lock:
+                    self._write_scheduled = False
+                self.deferred_writes += 1
+                return
+            except RuntimeError:
+                # closed on shutdown: nobody will run the job any more
+                with self._lock:
+                    self._write_scheduled = False
+        self._write_unwritten()
+
+    def flush(self):
+        # synchronous: everything logged so far is on disk when this returns
+        with self._lock:
+            self._flush()
+        self._write_unwritten()
 
     def log_event(self, emotion_dict=None, partner_data=None, **kwargs):
         emotion_dict = emotion_dict or {}
         partner_data = partner_data or {}
-        current_timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-        row_data = {
-            **{col: None for col in self.columns},
-            **kwargs,
-            'timestamp': current_timestamp,
-            'username': self.username,
-            'angry': emotion_dict.get('angry', 0),
-            'disgust': emotion_dict.get('disgust', 0),
-            'fear': emotion_dict.get('fear', 0),
-            'happy': emotion_dict.get('happy', 0),
-            'sad': emotion_dict.get('sad', 0),
-            'surprise': emotion_dict.get('surprise', 0),
-            'neutral': emotion_dict.get('neutral', 0),
-            'partner_name': self.partnername,
-            **{f'partner_{k}': v for k, v in partner_data.items()},
-        }
-
-        self.frames.append(row_data)
+        with self._lock:
+            events = self.events
+            # written straight into the column buffer; later writes win, as the old row dict merge did
+            row = events.new_row(time.time_ns() // 1_000_000)
+            for k, v in kwargs.items():
+                if k != 'timestamp':
+                    events.set(row, k, v)
+            events.set(row, 'username', self.username)
+            for k in EMOTIONS:
+                events.set(row, k, emotion_dict.get(k, 0))
+            events.set(row, 'partner_name', self.partnername)
+            for k, v in partner_data.items():
+                events.set(row, f'partner_{k}', v)
+            swapped = self._maybe_flush()
+        if swapped:
+            self._schedule_write()
+
+    def log_row(self, fill, *args):
+        # fill(events, row, logger, *args) writes one row's columns itself (see ChatEventSchema)
+        with self._lock:
+            events = self.events
+            fill(events, events.new_row(time.time_ns() // 1_000_000), self, *args)
+            swapped = self._maybe_flush()
+        if swapped:
+            self._schedule_write()
+
+    def _maybe_flush(self) -> bool:
+        if self.flush_every > 0 and (len(self.events) >= self.flush_every
+                                     or time.monotonic() - self._last_flush >= self.flush_interval_s):
+            return self._flush()
+        return False
 
     def save_to_excel(self):
         if not self.username:
             print("No username set")
             return None
-        if not self.frames:
+        if not len(self):
             print(f"No data to save for {self.username}")
             return None
 
@@ -69,10 +180,18 @@ class Logger:
         path = os.path.join(base_dir, filename)
 
         try:
-            import pandas as pd
-            df = pd.DataFrame(self.frames)
-            df.to_excel(path, index=False)
-            print(f"Saved {len(self.frames)} entries to {path}")
+            with self._lock:
+                self._flush()
+            with self._write_lock:
+                self._write_unwritten()
+                # built from the on-disk session log, row by row
+                rows = self.writer.export_excel(path)
+                # exported: the parts are not needed any more; later events start a new log
+                self.writer.remove()
+                self.writer = None
+                with self._lock:
+                    self._flushed -= rows
+            print(f"Saved {rows} entries to {path}")
             return path
         except Exception as e:
             print(f"Error saving to Excel: {e}")
@@ -0,0 +1,79 @@
+import threading
+from collections import OrderedDict
+
+
+class MatchmakingQueue:
+    """Users waiting for a chat partner, oldest first.
+
+    Entries are kept in one insertion-ordered dict keyed by sid, so enqueue, taking
+    the oldest waiter and removing a disconnected sid are all O(1). With `match_key`
+    (user_id -> e.g. the user's chat language) each key also has its own ordered
+    bucket: a newcomer is paired with the oldest waiter of the same key first, and
+    with the oldest waiter overall only when none is waiting and `strict` is off
+    (strict still pairs anyone with users whose key is unknown).
+    """
+
+    def __init__(self, match_key=None, strict: bool = False):
+        self.match_key = match_key
+        self.strict = strict
+        self._waiting = OrderedDict()  # sid -> entry
+        self._buckets = {}  # key (None: unknown) -> OrderedDict(sid -> entry)
+        self._lock = threading.Lock()
+        self.matched = 0
+        self.matched_on_key = 0
+
+    def __len__(self):
+        return len(self._waiting)
+
+    def _key(self, user_id):
+        if self.match_key is None:
+            return None
+        try:
+            return self.match_key(user_id) or None
+        except Exception:
+            return None
+
+    def _pop(self, sid):
+        entry = self._waiting.pop(sid, None)
+        if entry is not None:
+            bucket = self._buckets.get(entry['key'])
+            if bucket is not None:
+                bucket.pop(sid, None)
+                if not bucket:
+                    del self._buckets[entry['key']]
+        return entry
+
+    def match_or_enqueue(self, sid, user_id, username):
+        # -> the partner's entry {'sid', 'user_id', 'username', 'key'}, or None when queued
+        key = self._key(user_id)
+        with self._lock:
+            self._pop(sid)
+            bucket = self._buckets.get(key) if key is not None else None
+            anyone = self._buckets.get(None) if self.strict and key is not None else self._waiting
+            if bucket:
+                partner = self._pop(next(iter(bucket)))
+                self.matched_on_key += 1
+            elif anyone:
+                partner = self._pop(next(iter(anyone)))
+            else:
+                partner = None
+            if partner is not None:
+                self.matched += 1
+                return partner
+            entry = {'sid': sid, 'user_id': user_id, 'username': username, 'key': key}
+            self._waiting[sid] = entry
+            self._buckets.setdefault(key, OrderedDict())[sid] = entry
+            return None
+
+    def remove(self, sid):
+        with self._lock:
+            return self._pop(sid) is not None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "waiting": len(self._waiting),
+                "waiting_by_key": {k or "": len(b) for k, b in self._buckets.items()},
+                "matched": self.matched,
+                "matched_on_key": self.matched_on_key,
+            }
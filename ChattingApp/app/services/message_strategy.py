@@ -1,13 +1,59 @@
+import threading
+import time
 from abc import ABC, abstractmethod
 
 class SentimentStrategy(ABC):
     @abstractmethod
-    def predict(self, text):
+    def predict(self, text, final=True):
         pass
 
 class BertSentimentStrategy(SentimentStrategy):
     def __init__(self, model):
         self.model = model
 
-    def predict(self, text):
-        return self.model.predict(text)
\ No newline at end of file
+    def predict(self, text, final=True):
+        return self.model.predict(text)
+
+class CascadeSentimentStrategy(SentimentStrategy):
+    # typing events are answered by the lexicon unless its negativity lands within
+    # `margin` of the alert threshold or it found no lexicon word at all (other
+    # languages, negativity without AFINN words); final messages always go to BERT
+    def __init__(self, model, fast_model, threshold=0.31, margin=0.15):
+        self.model = model
+        self.fast_model = fast_model
+        self.threshold = threshold
+        self.margin = margin
+        self._lock = threading.Lock()
+        self._counts = {"lexicon": 0, "bert": 0}
+        self.no_hit = 0
+        self._time_s = {"lexicon": 0.0, "bert": 0.0}
+
+    def predict(self, text, final=True):
+        start = time.perf_counter()
+        if not final:
+            pred, hits = self.fast_model.predict_with_hits(text)
+            if not hits:
+                with self._lock:
+                    self.no_hit += 1
+            elif abs(float(pred[0][0]) - self.threshold) > self.margin:
+                return self._answer("lexicon", pred, start)
+        return self._answer("bert", self.model.predict(text), start)
+
+    def _answer(self, tier, pred, start):
+        with self._lock:
+            self._counts[tier] += 1
+            self._time_s[tier] += time.perf_counter() - start
+        return [pred[0], pred[1], tier]
+
+    def stats(self):
+        with self._lock:
+            total = sum(self._counts.values())
+            return {
+                "threshold": self.threshold,
+                "margin": self.margin,
+                **{f"{tier}_answers": n for tier, n in self._counts.items()},
+                **{f"{tier}_avg_ms": (self._time_s[tier] / n * 1000.0) if n else 0.0
+                   for tier, n in self._counts.items()},
+                "lexicon_share": self._counts["lexicon"] / total if total else 0.0,
+                "lexicon_no_hit": self.no_hit,
+            }
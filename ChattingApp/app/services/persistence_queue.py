@@ -0,0 +1,83 @@
+import itertools
+import queue
+import threading
+import time
+
+
+class PersistenceQueue:
+    """Write-behind queue for disk work (session log flushes, Excel exports).
+
+    `submit` returns a job id immediately and the job runs on one background thread,
+    so socket handlers never wait for the disk. `on_done(job_id, result)` is called on
+    that thread when the job finishes. The queue is bounded: when `max_pending` jobs are
+    waiting, `submit` blocks until one finishes, or raises queue.Full with `block=False`.
+    `close` runs everything still queued before it returns, so nothing submitted is lost
+    on shutdown; `submit` raises RuntimeError after that.
+    """
+
+    def __init__(self, max_pending: int = 64, name: str = "persistence"):
+        self._queue = queue.Queue(maxsize=max(1, int(max_pending)))
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._closed = False
+        self.completed = 0
+        self.failed = 0
+        self.max_depth = 0
+        self._busy_s = 0.0
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, fn, *args, on_done=None, block: bool = True, **kwargs) -> int:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("PersistenceQueue is closed")
+            job_id = next(self._ids)
+        self._queue.put((job_id, fn, args, kwargs, on_done), block=block)
+        with self._lock:
+            self.max_depth = max(self.max_depth, self._queue.qsize())
+        return job_id
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            job_id, fn, args, kwargs, on_done = job
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+            except Exception as e:
+                print(f"[persistence] job {job_id} {getattr(fn, '__name__', fn)} failed: {e}")
+                result, ok = None, False
+            with self._lock:
+                self._busy_s += time.perf_counter() - start
+                if ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+            if on_done:
+                try:
+                    on_done(job_id, result)
+                except Exception as e:
+                    print(f"[persistence] job {job_id} callback failed: {e}")
+
+    def close(self, timeout: float | None = None):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        # the sentinel queues behind everything already submitted
+        self._queue.put(None)
+        self._worker.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            done = self.completed + self.failed
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self.max_depth,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_job_ms": self._busy_s / done * 1000.0 if done else 0.0,
+            }
@@ -6,22 +6,77 @@ import numpy as np
 from deepface import DeepFace
 from app.services.logger_manager import LoggerManager
 from app.services.chat_manager import ChatManager
+from app.services.inference_batcher import InferenceBatcher
+from app.services.frame_workers import FrameWorkerPool
+from app.services.face_tracker import FaceTracker, TrackingStats
+from app.services.frame_dedup import FrameDeduplicator
+from app.services.frame_sampler import AdaptiveFrameSampler
+from app.services.frame_decode import DecodedFrame
+from app.services.persistence_queue import PersistenceQueue
+from app.services.session_registry import SessionRegistry
+from app.services.state_backend import StateBackend, InMemoryStateBackend
+from app.models.deepface_model import DeepFaceEmotionModel, extract_face
 import threading
-import hashlib
 
 class RecordingService:
-    def __init__(self):
-        self.logger_manager = LoggerManager(self)
-        self.chat_manager = ChatManager()
-
-        self.sessions = {}
+    def __init__(self, emotion_batch_size: int = 32, emotion_batch_window_ms: float = 10.0,
+                 frame_workers: int = 0, frame_worker_slots: int = 4, frame_slot_wait_s: float = 0.05,
+                 face_redetect_every: int = 5, face_track_min_similarity: float = 0.7,
+                 frame_dedup_max_distance: int = 4, frame_dedup_max_reuse: int = 10,
+                 frame_dedup_max_age_s: float = 2.0, frame_sampler: AdaptiveFrameSampler | None = None,
+                 frame_decode_scale: int = 2, log_flush_every: int = 500, log_flush_interval_s: float = 10.0,
+                 persistence: PersistenceQueue | None = None, registry: SessionRegistry | None = None,
+                 state: StateBackend | None = None):
+        # sessions, pairings and partner maps every server process must see
+        self.state = state or InMemoryStateBackend()
+        self.logger_manager = LoggerManager(self, log_flush_every, log_flush_interval_s, persistence, self.state)
+        self.chat_manager = ChatManager(self.state)
+
+        # every per-user dict below (and in the managers) is released through the registry
+        self.registry = registry or SessionRegistry()
+        self.registry.register("recording", self.release_user, counts=self.counts)
+        self.registry.register("loggers", self.logger_manager.release_user,
+                               before_evict=self.logger_manager.close_user_log,
+                               counts=self.logger_manager.counts, memory=self.logger_manager.memory_bytes)
+        self.registry.register("chat_sessions", self.chat_manager.release_user, counts=self.chat_manager.counts)
+
+        self.sessions = self.state.map("recording_sessions")  # user_id -> {"sid"}
 
         self._deepface_lock = threading.Lock()
 
+        # sessions / current_messages / message_sentiment: written from socket handlers,
+        # frame pipeline threads and the registry sweeper
+        self._lock = threading.Lock()
         self.current_messages = {}
         self.message_sentiment = {}
 
-        self._init_deepface()
+        # near-identical consecutive frames of a user reuse the last emotion result
+        self.frame_dedup = FrameDeduplicator(frame_dedup_max_distance, max_reuse=frame_dedup_max_reuse,
+                                             max_age_s=frame_dedup_max_age_s)
+        # per-user frame interval, widened when analysis falls behind
+        self.frame_sampler = frame_sampler or AdaptiveFrameSampler()
+        # JPEGs are decoded at 1/scale for detection; full resolution only for small face crops
+        self.frame_decode_scale = frame_decode_scale
+
+        # frame_workers > 0: that many analysis processes, < 0: one per spare core, 0: in-process
+        self.frame_pool = None
+        self.emotion_engine = None
+        self.face_tracker = None
+        if frame_workers:
+            self.frame_pool = FrameWorkerPool(frame_workers if frame_workers > 0 else None, frame_worker_slots,
+                                              redetect_every=face_redetect_every,
+                                              min_similarity=face_track_min_similarity,
+                                              slot_wait_s=frame_slot_wait_s)
+            self.tracking = self.frame_pool.tracking
+        else:
+            # the detector only runs every few frames per user; in between the last face box is reused
+            self.face_tracker = FaceTracker(face_redetect_every, face_track_min_similarity)
+            self.tracking = TrackingStats()
+            self._init_deepface()
+            # emotion classification for all users' face crops goes through one batched model
+            self.emotion_engine = InferenceBatcher(
+                DeepFaceEmotionModel(), emotion_batch_size, emotion_batch_window_ms, name="emotion-batcher"
+            )
 
     def _init_deepface(self):
         try:
@@ -46,65 +101,128 @@ class RecordingService:
         self.logger_manager.partners[user2_id] = user1_id
 
     def start_session(self, user_id: int, sid: str):
-        self.sessions[user_id] = {"sid": sid, "last_frame_ts": 0.0}
+        with self._lock:
+            self.sessions[user_id] = {"sid": sid}
+        self.registry.connected(user_id, sid)
+        self.frame_sampler.drop(user_id)
 
-    def stop_session(self, user_id: int):
-        saved_files = []
+    def stop_session(self, user_id: int, on_saved=None):
+        # -> save job id (or None); the files are written in the background, see LoggerManager
         print(f"Stopping session for user {user_id}")
-        saved_files = self.logger_manager.save_session_first_stop(user_id)
-        self.sessions.pop(user_id, None)
-        return saved_files
+        job_id = self.logger_manager.save_session_first_stop(user_id, on_saved)
+        with self._lock:
+            self.sessions.pop(user_id, None)
+        self.frame_dedup.drop(user_id)
+        self.frame_sampler.drop(user_id)
+        if self.face_tracker is not None:
+            self.face_tracker.drop(user_id)
+        return job_id
+
+    def release_user(self, user_id):
+        with self._lock:
+            self.sessions.pop(user_id, None)
+            self.current_messages.pop(user_id, None)
+            self.message_sentiment.pop(user_id, None)
+        self.frame_dedup.drop(user_id)
+        self.frame_sampler.drop(user_id)
+        if self.face_tracker is not None:
+            self.face_tracker.drop(user_id)
+
+    def counts(self):
+        with self._lock:
+            return {
+                "sessions": len(self.sessions),
+                "current_messages": len(self.current_messages),
+                "message_sentiment": len(self.message_sentiment),
+            }
 
     def update_current_message(self, user_id, message):
-        self.current_messages[user_id] = message
-
-    def ingest_frame_b64(self, user_id: int, sid: str, frame_b64: str, min_interval_s: float = 0.4):
-        sess = self.sessions.get(user_id)
+        with self._lock:
+            self.current_messages[user_id] = message
+
+    def ingest_frame_b64(self, user_id: int, sid: str, frame_b64: str):
+        # session and rate checks come first: a frame that would be dropped is never base64-decoded
+        if not self.admit_frame(user_id, sid):
+            return None
+        return self.ingest_admitted(user_id, frame_b64, b64=True)
+
+    def ingest_frame_bytes(self, user_id: int, sid: str, img_bytes):
+        # img_bytes: raw JPEG from a binary socket.io attachment (bytes / bytearray / memoryview)
+        # returns the user's new frame interval (s) when the client should be told about it
+        if not self.admit_frame(user_id, sid):
+            return None
+        return self.ingest_admitted(user_id, img_bytes)
+
+    def admit_frame(self, user_id: int, sid: str) -> bool:
+        # cheap: session and rate checks only; every admitted frame must go through ingest_admitted
+        with self._lock:
+            sess = self.sessions.get(user_id)
         if not sess or sess.get("sid") != sid:
-            return
-        now = time.time()
-        if now - sess.get("last_frame_ts", 0.0) < min_interval_s:
-            return
-        sess["last_frame_ts"] = now
-
-        if "," in frame_b64:
-            frame_b64 = frame_b64.split(",", 1)[1]
+            return False
+        if not self.frame_sampler.allow(user_id, time.time()):
+            return False
+        self.registry.touch(user_id)
+        return True
+
+    def ingest_admitted(self, user_id: int, data, b64: bool = False, admitted_at: float | None = None):
+        # every admitted frame is reported back to the sampler, whether or not it decodes;
+        # admitted_at (perf_counter) counts the time it queued before this call as analysis latency
+        start = time.perf_counter() if admitted_at is None else admitted_at
         try:
-            img_bytes = base64.b64decode(frame_b64)
-            h = hashlib.md5(img_bytes[:4096]).hexdigest()
-            arr = np.frombuffer(img_bytes, dtype=np.uint8)
-            frame = cv2.imdecode(arr, cv2.IMREAD_COLOR)
+            if b64:
+                if "," in data:
+                    data = data.split(",", 1)[1]
+                data = base64.b64decode(data)
+            frame = DecodedFrame.decode(data, self.frame_decode_scale)
             if frame is None:
-                # print(f"[frame] user={user_id} decode failed (hash={h})")
-                return
-            # print(f"[frame] user={user_id} size={frame.shape[:2]} hash={h}")
+                # print(f"[frame] user={user_id} decode failed")
+                return None
+            # print(f"[frame] user={user_id} size={frame.image.shape[:2]} scale=1/{frame.scale}")
             self.process_frame(frame, user_id=user_id, username=self.logger_manager.user_names.get(user_id, ""), status="sender")
         except Exception as e:
-            print(f"ingest_frame_b64 error: {e}")
+            print(f"ingest_frame error: {e}")
+        finally:
+            new_interval = self.frame_sampler.done(user_id, time.perf_counter() - start)
+        return new_interval
+
+    def detect_face(self, frame_bgr):
+        with self._deepface_lock:
+            return extract_face(frame_bgr)
+
+    def analyze_frame(self, frame, user_id=None):
+        # frame: DecodedFrame, or a full-resolution BGR array; None when the worker pool dropped it
+        return self._analyze_with_box(frame, user_id)[0]
+
+    def _analyze_with_box(self, frame, user_id):
+        # -> (emotion dict or None, the user's face box in frame.image or None)
+        if isinstance(frame, np.ndarray):
+            frame = DecodedFrame(frame)
+        if self.frame_pool is not None:
+            return self.frame_pool.analyze_with_box(frame.image, user_id)
+        face, tracked, elapsed = self.face_tracker.get_face(user_id, frame, self.detect_face)
+        self.tracking.record(tracked, elapsed)
+        box = self.face_tracker.box(user_id) if user_id is not None else None
+        return self.emotion_engine.predict(face), box
+
+    def analyze_frame_cached(self, frame, user_id):
+        if isinstance(frame, np.ndarray):
+            frame = DecodedFrame(frame)
+        emo = self.frame_dedup.lookup(user_id, frame.image)
+        if emo is None:
+            emo, box = self._analyze_with_box(frame, user_id)
+            if emo is not None:
+                self.frame_dedup.remember(user_id, frame.image, emo, box)
+        return emo
 
     def process_frame(self, frame, user_id, username, status="sender"):
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         try:
-            # 1) spróbuj dokładniej (mediapipe + enforce)
-            try:
-                with self._deepface_lock:
-                    res = DeepFace.analyze(
-                        frame_rgb, actions=['emotion'],
-                        detector_backend='mediapipe',
-                        enforce_detection=True, silent=True
-                    )
-            except Exception:
-                # 2) fallback (opencv + bez enforce) – zapobiegnie wyjątkom, ale może dać bazowy rozkład
-                with self._deepface_lock:
-                    res = DeepFace.analyze(
-                        frame_rgb, actions=['emotion'],
-                        detector_backend='opencv',
-                        enforce_detection=False, silent=True
-                    )
-
-            emo = res[0]['emotion'] if isinstance(res, list) else res['emotion']
-
-            current_message = self.current_messages.get(user_id, "")
+            emo = self.analyze_frame_cached(frame, user_id)
+            if emo is None:
+                # dropped by the worker pool: every slot busy, nothing to log
+                return
+
+            with self._lock:
+                current_message = self.current_messages.get(user_id, "")
             partner_id = self.chat_manager.get_partner_id(user_id)
 
             if partner_id:
@@ -120,13 +238,16 @@ class RecordingService:
 
         except Exception as e:
             print(f"Error processing frame: {e}")
-            current_message = self.current_messages.get(user_id, "")
+            with self._lock:
+                current_message = self.current_messages.get(user_id, "")
             logger = self.logger_manager.get_logger(user_id, username)
             logger.log_event(emotion_dict={}, status=status, message=current_message)
 
     def update_sentiment(self, user_id, sentiment_data):
-        self.message_sentiment[user_id] = sentiment_data
+        with self._lock:
+            self.message_sentiment[user_id] = sentiment_data
         print(f"Sentiment updated for user {user_id}: {sentiment_data}")
 
     def get_sentiment(self, user_id):
-        return self.message_sentiment.get(user_id, None)
+        with self._lock:
+            return self.message_sentiment.get(user_id, None)
@@ -2,5 +2,5 @@ class SentimentService:
     def __init__(self, model):
         self.model = model
 
-    def analyze(self, text):
-        return self.model.predict(text)
\ No newline at end of file
+    def analyze(self, text, final=True):
+        return self.model.predict(text, final=final)
\ No newline at end of file
@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class SentimentCache:
+    def __init__(self, capacity: int = 4096, ttl_s: float | None = 600.0):
+        self.capacity = max(1, int(capacity))
+        self.ttl_s = ttl_s if ttl_s and ttl_s > 0 else None
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        expires_at = time.monotonic() + self.ttl_s if self.ttl_s else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "capacity": self.capacity,
+                "ttl_s": self.ttl_s,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class CachedSentimentModel:
+    """Answers repeated texts from a SentimentCache before they reach the model.
+
+    The key is the normalized text, so a hit skips tokenization and inference; on a miss
+    the normalized text is passed down so the model does not normalize it again.
+    """
+
+    def __init__(self, model, cache: SentimentCache, normalizer=None):
+        self.model = model
+        self.cache = cache
+        self.normalizer = normalizer
+
+    def predict(self, text):
+        key = self.normalizer(text) if self.normalizer else text
+        pred = self.cache.get(key)
+        if pred is None:
+            pred = self.model.predict(key)
+            self.cache.put(key, pred)
+        return pred
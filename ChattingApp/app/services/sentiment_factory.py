@@ -1,9 +1,11 @@
-from app.services.message_strategy import BertSentimentStrategy
+from app.services.message_strategy import BertSentimentStrategy, CascadeSentimentStrategy
 
 class SentimentStrategyFactory:
     @staticmethod
-    def get_strategy(strategy_type, model=None):
+    def get_strategy(strategy_type, model=None, fast_model=None, **options):
         if strategy_type == "bert":
             return BertSentimentStrategy(model)
+        elif strategy_type == "cascade":
+            return CascadeSentimentStrategy(model, fast_model, **options)
         else:
-            raise ValueError("Unknown strategy type")
\ No newline at end of file
+            raise ValueError("Unknown strategy type")
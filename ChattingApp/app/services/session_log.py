@@ -0,0 +1,96 @@
+import csv
+import glob
+import json
+import os
+
+
+class SessionLogWriter:
+    """Append-only on-disk log of one session's events: CSV parts under data/sessions/<name>/.
+
+    Every cell is JSON-encoded so types survive the round trip (None vs "", 3 vs "3").
+    A new part is started only when the set of columns grows, so each part has one
+    header. The Excel workbook is built from the parts row by row (openpyxl write-only
+    mode), so neither logging nor export needs the whole session in memory.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._columns = None
+        self._part = len(self.parts()) - 1
+        self.rows_written = 0
+
+    def _part_path(self, index):
+        return os.path.join(self.directory, f"part-{index:05d}.csv")
+
+    def parts(self):
+        return sorted(glob.glob(os.path.join(self.directory, "part-*.csv")))
+
+    def append(self, columns, rows):
+        new_part = columns != self._columns
+        if new_part:
+            self._part += 1
+            self._columns = list(columns)
+        with open(self._part_path(self._part), "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if new_part:
+                writer.writerow(self._columns)
+            for row in rows:
+                writer.writerow([json.dumps(v, default=str, ensure_ascii=False) for v in row])
+                self.rows_written += 1
+
+    def remove(self):
+        # after a successful export: delete the parts, and the directory once it is empty
+        for path in self.parts():
+            os.remove(path)
+        try:
+            os.rmdir(self.directory)
+        except OSError:
+            pass
+        self._columns = None
+        self._part = -1
+
+    def iter_rows(self):
+        # -> (part header, decoded row) for every logged event, oldest first
+        for path in self.parts():
+            with open(path, newline="", encoding="utf-8") as f:
+                reader = csv.reader(f)
+                header = next(reader, None)
+                if header is None:
+                    continue
+                for row in reader:
+                    yield header, [json.loads(cell) for cell in row]
+
+    def columns(self):
+        # union of all part headers, in first-seen order
+        columns = {}
+        for path in self.parts():
+            with open(path, newline="", encoding="utf-8") as f:
+                columns.update(dict.fromkeys(next(csv.reader(f), [])))
+        return list(columns)
+
+    def export_excel(self, path):
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Alignment, Border, Font, Side
+
+        columns = self.columns()
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Sheet1")
+        # same header look pandas.to_excel gives
+        thin = Side(style="thin")
+        header = []
+        for col in columns:
+            cell = WriteOnlyCell(ws, value=col)
+            cell.font = Font(bold=True)
+            cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+            cell.alignment = Alignment(horizontal="center", vertical="top")
+            header.append(cell)
+        ws.append(header)
+        rows = 0
+        for part_columns, row in self.iter_rows():
+            values = dict(zip(part_columns, row))
+            ws.append([values.get(col) for col in columns])
+            rows += 1
+        wb.save(path)
+        return rows
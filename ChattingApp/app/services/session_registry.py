@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+
+
+class SessionRegistry:
+    """Owns the lifetime of every per-user piece of state kept by the services and namespaces.
+
+    Components `register` a release hook (drop everything kept for a user id), an
+    optional `before_evict` hook (e.g. flush/save that user's log) and functions
+    reporting how many objects / bytes they hold. Handlers `touch` a user on activity.
+    A sweeper thread evicts users idle for `ttl_s`, disconnected (and inactive since)
+    for `disconnect_ttl_s`, and, least recently active first, whoever is over the
+    `max_users` or `max_memory_mb` caps.
+    """
+
+    def __init__(self, ttl_s: float = 1800.0, disconnect_ttl_s: float = 120.0, max_users: int = 2000,
+                 max_memory_mb: float = 256.0, sweep_interval_s: float = 30.0):
+        self.ttl_s = ttl_s
+        self.disconnect_ttl_s = disconnect_ttl_s
+        self.max_users = max_users
+        self.max_memory_bytes = max_memory_mb * 1024 * 1024
+        self.sweep_interval_s = sweep_interval_s
+        self._components = OrderedDict()  # name -> {"release", "before_evict", "counts", "memory"}
+        self._last_seen = OrderedDict()  # user_id -> monotonic ts, least recently active first
+        self._sids = {}  # user_id -> sid of its recording connection
+        self._disconnected = {}  # user_id -> monotonic ts of the disconnect
+        self._lock = threading.RLock()
+        self.evictions = Counter()
+        self._stop = threading.Event()
+        self._sweeper = None
+
+    def register(self, name, release, before_evict=None, counts=None, memory=None):
+        with self._lock:
+            self._components[name] = {"release": release, "before_evict": before_evict,
+                                      "counts": counts, "memory": memory}
+
+    def touch(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            self._last_seen[user_id] = now
+            self._last_seen.move_to_end(user_id)
+
+    def connected(self, user_id, sid):
+        with self._lock:
+            self._sids[user_id] = sid
+            self._disconnected.pop(user_id, None)
+        self.touch(user_id)
+
+    def disconnected(self, sid):
+        now = time.monotonic()
+        with self._lock:
+            for user_id, user_sid in self._sids.items():
+                if user_sid == sid:
+                    self._disconnected[user_id] = now
+
+    def memory_bytes(self):
+        with self._lock:
+            hooks = [c["memory"] for c in self._components.values() if c["memory"]]
+        return sum(hook() for hook in hooks)
+
+    def evict(self, user_id, reason="manual"):
+        with self._lock:
+            if self._last_seen.pop(user_id, None) is None:
+                return False
+            self._sids.pop(user_id, None)
+            self._disconnected.pop(user_id, None)
+            components = list(self._components.items())
+        # flush/save first, while every component still has the user's state
+        for name, c in components:
+            if c["before_evict"]:
+                try:
+                    c["before_evict"](user_id)
+                except Exception as e:
+                    print(f"[sessions] {name} before_evict({user_id}) failed: {e}")
+        for name, c in components:
+            try:
+                c["release"](user_id)
+            except Exception as e:
+                print(f"[sessions] {name} release({user_id}) failed: {e}")
+        with self._lock:
+            self.evictions[reason] += 1
+        return True
+
+    def sweep(self, now: float | None = None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            idle = [u for u, seen in self._last_seen.items() if now - seen >= self.ttl_s]
+            # a user still active after the recording socket dropped (e.g. chatting) is not gone;
+            # the idle TTL covers them once they stop
+            gone = [u for u, ts in self._disconnected.items()
+                    if now - ts >= self.disconnect_ttl_s and self._last_seen.get(u, ts) <= ts]
+        evicted = [u for u in idle if self.evict(u, "idle")]
+        evicted += [u for u in gone if self.evict(u, "disconnected")]
+        while True:
+            with self._lock:
+                if not self._last_seen:
+                    break
+                over_users = len(self._last_seen) > self.max_users
+                oldest = next(iter(self._last_seen))
+            if not over_users and self.memory_bytes() <= self.max_memory_bytes:
+                break
+            if self.evict(oldest, "user_cap" if over_users else "memory_cap"):
+                evicted.append(oldest)
+        if evicted:
+            print(f"[sessions] evicted {len(evicted)} user(s): {evicted}")
+        return evicted
+
+    def start(self):
+        if self._sweeper is None:
+            self._sweeper = threading.Thread(target=self._run, name="session-sweeper", daemon=True)
+            self._sweeper.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.sweep_interval_s):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"[sessions] sweep failed: {e}")
+
+    def close(self):
+        self._stop.set()
+
+    def stats(self):
+        with self._lock:
+            components = list(self._components.items())
+            out = {
+                "users": len(self._last_seen),
+                "disconnected": len(self._disconnected),
+                "ttl_s": self.ttl_s,
+                "max_users": self.max_users,
+                "evictions": dict(self.evictions),
+            }
+        out["memory_bytes"] = self.memory_bytes()
+        out["objects"] = {name: c["counts"]() for name, c in components if c["counts"]}
+        return out
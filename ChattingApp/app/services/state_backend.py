@@ -0,0 +1,384 @@
+import json
+import os
+import secrets
+import socket
+import sqlite3
+import threading
+import time
+from collections.abc import MutableMapping, MutableSet
+
+from app.services.matchmaking import MatchmakingQueue
+
+
+class StateBackend:
+    """Where the state every worker process must agree on lives.
+
+    Pairing, the user -> session / partner maps and the per-user event guards are
+    taken from here instead of being plain dicts and sets, so that more than one
+    server process can run behind a load balancer. `map(name)` returns a mutable
+    mapping and `set(name)` a mutable set; keys and values must be JSON-serialisable.
+    Values are copies: mutate and assign back, never change one in place.
+    """
+
+    name = "base"
+
+    def map(self, name: str) -> MutableMapping:
+        raise NotImplementedError
+
+    def set(self, name: str) -> MutableSet:
+        raise NotImplementedError
+
+    def matchmaking(self, match_key=None, strict: bool = False):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def stats(self):
+        return {"backend": self.name}
+
+
+class InMemoryStateBackend(StateBackend):
+    """Plain dicts and sets: one server process, the behaviour the app always had."""
+
+    name = "memory"
+
+    def map(self, name):
+        return {}
+
+    def set(self, name):
+        return set()
+
+    def matchmaking(self, match_key=None, strict=False):
+        return MatchmakingQueue(match_key, strict)
+
+
+def _pid_alive(pid: int) -> bool:
+    # only asked about processes on this host; without a POSIX kill(pid, 0) the TTL decides
+    if os.name != "posix":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SqliteStateBackend(StateBackend):
+    """Shared state in one SQLite database in WAL mode, for several processes on one host.
+
+    Each thread of each process gets its own connection (reopened after a fork), so
+    readers never block the writer. Every map and set is a slice of one `kv` table;
+    the matchmaking queue is its own table, matched in a single IMMEDIATE transaction
+    so two workers can never pair the same waiter.
+
+    Rows are stamped with the process that wrote them (host:pid:boot token). Each process
+    heartbeats its row in `owners` every `owner_ttl_s / 3`; the rows of owners that
+    stopped heartbeating, or whose pid is gone on this host, are deleted, so sessions and
+    waiters of a crashed worker do not outlive it. The first process to open the database
+    when no other owner is alive starts from an empty state.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = "data/state.sqlite3", busy_timeout_ms: int = 5000, owner_ttl_s: float = 30.0):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.owner_ttl_s = owner_ttl_s
+        self.host = socket.gethostname()
+        self._boot = secrets.token_hex(4)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        # registered once the schema is there; a forked child registers on its first connection
+        self._registered_pid = os.getpid()
+        self._stop = threading.Event()
+        self._heartbeat = None
+        self.purged = 0
+        conn = self.connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(kv)")]
+            if columns and "owner" not in columns:
+                # written before rows had owners: transient state, start over
+                conn.execute("DROP TABLE kv")
+                conn.execute("DROP TABLE IF EXISTS waiting")
+            conn.execute("CREATE TABLE IF NOT EXISTS kv (name TEXT, key TEXT, value TEXT, owner TEXT,"
+                         " PRIMARY KEY (name, key)) WITHOUT ROWID")
+            conn.execute("CREATE TABLE IF NOT EXISTS waiting (seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+                         " sid TEXT UNIQUE, user_id INTEGER, username TEXT, key TEXT, owner TEXT)")
+            conn.execute("CREATE INDEX IF NOT EXISTS waiting_key ON waiting (key, seq)")
+            conn.execute("CREATE TABLE IF NOT EXISTS owners (owner TEXT PRIMARY KEY, host TEXT, pid INTEGER,"
+                         " seen_at REAL)")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._beat(conn)
+        self._start_heartbeat()
+        if self._live_owners() == {self.owner()}:
+            self.clear()
+        else:
+            self.purge_stale()
+
+    def connection(self):
+        pid = os.getpid()
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != pid:
+            # autocommit; transactions are opened explicitly where they are needed
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000.0, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, pid
+            with self._lock:
+                self._connections.append(conn)
+            if self._registered_pid != pid:
+                # first connection of this process (or of a forked child): announce it
+                self._registered_pid = pid
+                self._beat(conn)
+                self._start_heartbeat()
+        return conn
+
+    def owner(self) -> str:
+        # the pid is taken now, so a forked worker is an owner of its own
+        return f"{self.host}:{os.getpid()}:{self._boot}"
+
+    def _beat(self, conn):
+        conn.execute("INSERT OR REPLACE INTO owners (owner, host, pid, seen_at) VALUES (?, ?, ?, ?)",
+                     (self.owner(), self.host, os.getpid(), time.time()))
+
+    def _start_heartbeat(self):
+        self._stop.clear()
+        self._heartbeat = threading.Thread(target=self._run_heartbeat, name="state-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+    def _run_heartbeat(self):
+        while not self._stop.wait(self.owner_ttl_s / 3):
+            try:
+                self._beat(self.connection())
+                self.purge_stale()
+            except Exception as e:
+                print(f"[state] heartbeat failed: {e}")
+
+    def _is_dead(self, owner, host, pid, seen_at, now):
+        if owner == self.owner():
+            return False
+        if now - seen_at > self.owner_ttl_s:
+            return True
+        # same host: a pid that is gone (or is ours, under an older boot token) is dead now
+        return host == self.host and (pid == os.getpid() or not _pid_alive(pid))
+
+    def _live_owners(self):
+        now = time.time()
+        rows = self.connection().execute("SELECT owner, host, pid, seen_at FROM owners").fetchall()
+        return {row[0] for row in rows if not self._is_dead(*row, now)}
+
+    def purge_stale(self) -> int:
+        # -> rows deleted: those of owners that are gone, and any no live owner claims
+        conn = self.connection()
+        now = time.time()
+        dead = [row[0] for row in conn.execute("SELECT owner, host, pid, seen_at FROM owners").fetchall()
+                if self._is_dead(*row, now)]
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("DELETE FROM owners WHERE owner = ?", [(o,) for o in dead])
+            removed = 0
+            for table in ("kv", "waiting"):
+                removed += conn.execute(f"DELETE FROM {table} WHERE owner IS NULL"
+                                        f" OR owner NOT IN (SELECT owner FROM owners)").rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self.purged += removed
+        return removed
+
+    def map(self, name):
+        return SqliteMap(self, name)
+
+    def set(self, name):
+        return SqliteSet(self, name)
+
+    def matchmaking(self, match_key=None, strict=False):
+        return SqliteMatchmakingQueue(self, match_key, strict)
+
+    def clear(self):
+        # a fresh deployment: forget pairings and sessions left by processes that are gone
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM kv")
+            conn.execute("DELETE FROM waiting")
+            conn.execute("DELETE FROM owners WHERE owner != ?", (self.owner(),))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def close(self):
+        # this process's rows go with it
+        self._stop.set()
+        if self._heartbeat is not None and self._heartbeat is not threading.current_thread():
+            self._heartbeat.join(timeout=1.0)
+        try:
+            conn = self.connection()
+            conn.execute("DELETE FROM owners WHERE owner = ?", (self.owner(),))
+            self.purge_stale()
+        except sqlite3.Error as e:
+            print(f"[state] could not release rows on close: {e}")
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def stats(self):
+        conn = self.connection()
+        rows = conn.execute("SELECT name, COUNT(*) FROM kv GROUP BY name").fetchall()
+        owners = conn.execute("SELECT COUNT(*) FROM owners").fetchone()[0]
+        return {"backend": self.name, "path": self.path, "entries": dict(rows), "owners": owners,
+                "purged_rows": self.purged}
+
+
+def _dump(value):
+    return json.dumps(value, separators=(",", ":"))
+
+
+class SqliteMap(MutableMapping):
+    def __init__(self, backend: SqliteStateBackend, name: str):
+        self._backend = backend
+        self.name = name
+
+    def __getitem__(self, key):
+        row = self._backend.connection().execute(
+            "SELECT value FROM kv WHERE name = ? AND key = ?", (self.name, _dump(key))).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return json.loads(row[0])
+
+    def __setitem__(self, key, value):
+        self._backend.connection().execute(
+            "INSERT OR REPLACE INTO kv (name, key, value, owner) VALUES (?, ?, ?, ?)",
+            (self.name, _dump(key), _dump(value), self._backend.owner()))
+
+    def __delitem__(self, key):
+        cur = self._backend.connection().execute(
+            "DELETE FROM kv WHERE name = ? AND key = ?", (self.name, _dump(key)))
+        if not cur.rowcount:
+            raise KeyError(key)
+
+    def pop(self, key, *default):
+        # one round trip (RETURNING needs SQLite >= 3.35)
+        row = self._backend.connection().execute(
+            "DELETE FROM kv WHERE name = ? AND key = ? RETURNING value", (self.name, _dump(key))).fetchone()
+        if row is not None:
+            return json.loads(row[0])
+        if default:
+            return default[0]
+        raise KeyError(key)
+
+    def __iter__(self):
+        rows = self._backend.connection().execute("SELECT key FROM kv WHERE name = ?", (self.name,)).fetchall()
+        return (json.loads(key) for (key,) in rows)
+
+    def __len__(self):
+        return self._backend.connection().execute("SELECT COUNT(*) FROM kv WHERE name = ?", (self.name,)).fetchone()[0]
+
+    def values(self):
+        rows = self._backend.connection().execute("SELECT value FROM kv WHERE name = ?", (self.name,)).fetchall()
+        return [json.loads(value) for (value,) in rows]
+
+
+class SqliteSet(MutableSet):
+    def __init__(self, backend: SqliteStateBackend, name: str):
+        self._map = SqliteMap(backend, name)
+
+    def __contains__(self, value):
+        return value in self._map
+
+    def __iter__(self):
+        return iter(self._map)
+
+    def __len__(self):
+        return len(self._map)
+
+    def add(self, value):
+        self._map[value] = 1
+
+    def discard(self, value):
+        self._map.pop(value, None)
+
+
+class SqliteMatchmakingQueue:
+    """MatchmakingQueue over the shared `waiting` table (same matching rules)."""
+
+    def __init__(self, backend: SqliteStateBackend, match_key=None, strict: bool = False):
+        self._backend = backend
+        self.match_key = match_key
+        self.strict = strict
+        self.matched = 0
+        self.matched_on_key = 0
+
+    def __len__(self):
+        return self._backend.connection().execute("SELECT COUNT(*) FROM waiting").fetchone()[0]
+
+    _key = MatchmakingQueue._key
+
+    def match_or_enqueue(self, sid, user_id, username):
+        key = self._key(user_id)
+        conn = self._backend.connection()
+        select = "SELECT seq, sid, user_id, username, key FROM waiting"
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM waiting WHERE sid = ?", (sid,))
+            row = None
+            if key is not None:
+                row = conn.execute(f"{select} WHERE key = ? ORDER BY seq LIMIT 1", (key,)).fetchone()
+            on_key = row is not None
+            if row is None:
+                if self.strict and key is not None:
+                    row = conn.execute(f"{select} WHERE key IS NULL ORDER BY seq LIMIT 1").fetchone()
+                else:
+                    row = conn.execute(f"{select} ORDER BY seq LIMIT 1").fetchone()
+            if row is not None:
+                conn.execute("DELETE FROM waiting WHERE seq = ?", (row[0],))
+            else:
+                conn.execute("INSERT INTO waiting (sid, user_id, username, key, owner) VALUES (?, ?, ?, ?, ?)",
+                             (sid, user_id, username, key, self._backend.owner()))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        self.matched += 1
+        self.matched_on_key += on_key
+        return {'sid': row[1], 'user_id': row[2], 'username': row[3], 'key': row[4]}
+
+    def remove(self, sid):
+        return bool(self._backend.connection().execute("DELETE FROM waiting WHERE sid = ?", (sid,)).rowcount)
+
+    def stats(self):
+        rows = self._backend.connection().execute("SELECT key, COUNT(*) FROM waiting GROUP BY key").fetchall()
+        return {
+            "waiting": sum(n for _, n in rows),
+            "waiting_by_key": {k or "": n for k, n in rows},
+            "matched": self.matched,
+            "matched_on_key": self.matched_on_key,
+        }
+
+
+def create_state_backend(kind: str = "memory", path: str = "data/state.sqlite3",
+                         owner_ttl_s: float = 30.0) -> StateBackend:
+    if kind == "memory":
+        return InMemoryStateBackend()
+    elif kind == "sqlite":
+        return SqliteStateBackend(path, owner_ttl_s=owner_ttl_s)
+    else:
+        raise ValueError(f"Unknown state backend: {kind}")
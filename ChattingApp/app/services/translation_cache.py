@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class TranslationCache:
+    """Translations keyed by (lang, text), with LRU size and TTL eviction.
+
+    The key already names the target language, so a user switching languages never
+    invalidates anything. With `path` every translation is also written to a SQLite
+    file and misses fall back to it, so a restarted server starts warm instead of
+    sending every message to the remote translator again. Expiry is wall-clock time,
+    because it has to survive restarts; the file is pruned of expired rows and trimmed
+    to `disk_capacity` on open and every `prune_every` writes.
+    """
+
+    def __init__(self, capacity: int = 20000, ttl_s: float | None = 7 * 24 * 3600, path: str | None = None,
+                 disk_capacity: int = 200000, prune_every: int = 1000):
+        self.capacity = max(1, int(capacity))
+        self.ttl_s = ttl_s if ttl_s and ttl_s > 0 else None
+        self.path = path
+        self.disk_capacity = disk_capacity
+        self.prune_every = prune_every
+        self._data = OrderedDict()  # (lang, text) -> (expires_at, translation)
+        self._lock = threading.Lock()
+        self._db = None
+        self._writes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        if path:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS translations (lang TEXT, text TEXT, translation TEXT,"
+                             " expires_at REAL, written_at REAL, PRIMARY KEY (lang, text)) WITHOUT ROWID")
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(translations)")]
+            if "written_at" not in columns:
+                # files from before written_at: their rows sort first (NULL) and are trimmed first
+                self._db.execute("ALTER TABLE translations ADD COLUMN written_at REAL")
+            self._prune()
+
+    def get(self, lang: str, text: str) -> str | None:
+        key = (lang, text)
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.expirations += 1
+            if self._db is not None:
+                row = self._db.execute("SELECT translation, expires_at FROM translations WHERE lang = ? AND text = ?",
+                                       key).fetchone()
+                if row is not None and (row[1] is None or row[1] > now):
+                    self._remember(key, row[1], row[0])
+                    self.disk_hits += 1
+                    return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, lang: str, text: str, translation: str, persist: bool = True):
+        # persist=False: memory only, e.g. for text that is unlikely to be seen again
+        now = time.time()
+        expires_at = now + self.ttl_s if self.ttl_s else None
+        with self._lock:
+            self._remember((lang, text), expires_at, translation)
+            if self._db is not None and persist:
+                self._db.execute("INSERT OR REPLACE INTO translations (lang, text, translation, expires_at, written_at)"
+                                 " VALUES (?, ?, ?, ?, ?)", (lang, text, translation, expires_at, now))
+                self._writes += 1
+                if self._writes % self.prune_every == 0:
+                    self._prune()
+
+    def _remember(self, key, expires_at, value):
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.capacity:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def _prune(self):
+        self._db.execute("DELETE FROM translations WHERE expires_at <= ?", (time.time(),))
+        # over the cap: drop the oldest writes (expires_at is NULL for every row without a TTL)
+        self._db.execute("DELETE FROM translations WHERE (lang, text) IN (SELECT lang, text FROM translations"
+                         " ORDER BY written_at LIMIT max(0, (SELECT COUNT(*) FROM translations) - ?))",
+                         (self.disk_capacity,))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM translations")
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._data),
+                "capacity": self.capacity,
+                "ttl_s": self.ttl_s,
+                "persistent": self._db is not None,
+                "stored": self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0] if self._db else 0,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,86 @@
+import threading
+import time
+
+
+def _spawn_thread(fn, *args):
+    t = threading.Thread(target=fn, args=args, daemon=True)
+    t.start()
+    return t
+
+
+def _call_later(delay, fn, *args):
+    t = threading.Timer(delay, fn, args=args)
+    t.daemon = True
+    t.start()
+    return t
+
+
+class TypingCoalescer:
+    """Per-user latest-wins scheduler for typing events.
+
+    Only the newest not-yet-started state of each user is kept; anything it replaces is
+    counted as coalesced and never processed. States of one user are processed one at a
+    time and at least `min_interval_s` apart; a throttled user is re-scheduled with
+    `call_later` instead of holding a worker while it waits.
+    """
+
+    def __init__(self, process, min_interval_s: float = 0.0, spawn=None, call_later=None):
+        self.process = process
+        self.min_interval_s = max(0.0, float(min_interval_s))
+        self._spawn = spawn or _spawn_thread
+        self._call_later = call_later or _call_later
+        self._lock = threading.Lock()
+        self._pending = {}     # user_id -> newest state not yet started
+        self._running = set()  # user_ids with an active drain loop
+        self._last_run = {}    # user_id -> monotonic start of last processed state
+        self.submitted = 0
+        self.coalesced = 0
+        self.processed = 0
+
+    def submit(self, user_id, state):
+        with self._lock:
+            self.submitted += 1
+            if user_id in self._pending:
+                self.coalesced += 1
+            self._pending[user_id] = state
+            if user_id in self._running:
+                return
+            self._running.add(user_id)
+        self._spawn(self._drain, user_id)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._pending.pop(user_id, None)
+            if user_id not in self._running:
+                self._last_run.pop(user_id, None)
+
+    def _drain(self, user_id):
+        while True:
+            with self._lock:
+                if user_id not in self._pending:
+                    self._running.discard(user_id)
+                    return
+                now = time.monotonic()
+                wait = self._last_run.get(user_id, 0.0) + self.min_interval_s - now
+                if wait <= 0:
+                    state = self._pending.pop(user_id)
+                    self._last_run[user_id] = now
+                    self.processed += 1
+            if wait > 0:
+                self._call_later(wait, self._spawn, self._drain, user_id)
+                return
+            try:
+                self.process(state)
+            except Exception as e:
+                print(f"[typing] error processing state for user={user_id}: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "submitted": self.submitted,
+                "processed": self.processed,
+                "coalesced": self.coalesced,
+                "pending": len(self._pending),
+                "active_users": len(self._running),
+                "min_interval_s": self.min_interval_s,
+            }
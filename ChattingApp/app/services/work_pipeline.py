@@ -0,0 +1,88 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class WorkPipeline:
+    """Thread pool for blocking socket work (model inference, translation HTTP calls).
+
+    Handlers submit a job and return immediately; `on_done` receives the job's result on
+    the worker thread, which is where the handler emits back to its client. Jobs sent with
+    `submit_ordered` run one at a time and in submission order per key.
+    """
+
+    def __init__(self, max_workers: int = 4, name: str = "pipeline"):
+        self.max_workers = max(1, int(max_workers))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._ordered = {}  # key -> deque of jobs waiting behind the running one
+        self._running = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.failed = 0
+
+    def submit(self, fn, *args, on_done=None, **kwargs):
+        with self._lock:
+            self._queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self._queued)
+        return self._executor.submit(self._run, fn, args, kwargs, on_done)
+
+    def submit_ordered(self, key, fn, *args, **kwargs):
+        with self._lock:
+            waiting = self._ordered.get(key)
+            if waiting is not None:
+                waiting.append((fn, args, kwargs))
+                return
+            self._ordered[key] = deque()
+        self.submit(self._run_ordered, key, fn, args, kwargs)
+
+    def _run_ordered(self, key, fn, args, kwargs):
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                waiting = self._ordered[key]
+                nxt = waiting.popleft() if waiting else None
+                if nxt is None:
+                    del self._ordered[key]
+            if nxt is not None:
+                self.submit(self._run_ordered, key, *nxt)
+
+    def _run(self, fn, args, kwargs, on_done):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            result = fn(*args, **kwargs)
+            if on_done:
+                on_done(result)
+            with self._lock:
+                self.completed += 1
+            return result
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            print(f"[pipeline] {getattr(fn, '__name__', fn)} failed: {e}")
+            raise
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def queue_depth(self):
+        with self._lock:
+            return self._queued + sum(len(w) for w in self._ordered.values())
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queue_depth": self._queued + sum(len(w) for w in self._ordered.values()),
+                "running": self._running,
+                "max_queue_depth": self.max_queue_depth,
+                "completed": self.completed,
+                "failed": self.failed,
+            }
@@ -1,18 +1,100 @@
 from itertools import count
+import threading
 from flask_socketio import Namespace, emit
 from flask import request
 from app.services.recording import RecordingService
 from app.utils.translator_service import TranslatorService
+from app.services.typing_coalescer import TypingCoalescer
+from app.services.work_pipeline import WorkPipeline
 import json
 
 class ChatNamespace(Namespace):
-    def __init__(self, namespace, sentiment_service, recording_service: RecordingService, translator_service: TranslatorService):
+    def __init__(self, namespace, sentiment_service, recording_service: RecordingService, translator_service: TranslatorService,
+                 typing_min_interval_s: float = 0.0, alert_threshold: float = 0.31, pipeline: WorkPipeline | None = None):
         super().__init__(namespace)
         self.sentiment_service = sentiment_service
         self.recording_service = recording_service
         self.translator_service = translator_service
         self._warn_counts = {}
         self._corr_counts = {}
+        # chat events go to the pair's room, not to every client
+        self._sids = {}   # user_id -> sid of its /chat connection
+        self._rooms = {}  # sid -> pair room it has entered
+        # the SessionRegistry sweeper releases users while handlers run
+        self._lock = threading.RLock()
+        self.alert_threshold = alert_threshold
+        # inference and translation run on the pipeline, never on the socket loop
+        self.pipeline = pipeline or WorkPipeline()
+        self.typing_coalescer = TypingCoalescer(
+            self._process_typing, min_interval_s=typing_min_interval_s, spawn=self.pipeline.submit,
+        )
+        self.recording_service.registry.register("chat", self.release_user, counts=self.counts)
+
+    def release_user(self, user_id):
+        with self._lock:
+            sid = self._sids.pop(user_id, None)
+            if sid is not None:
+                self._rooms.pop(sid, None)
+            self._warn_counts.pop(user_id, None)
+            self._corr_counts.pop(user_id, None)
+        self.typing_coalescer.discard(user_id)
+        self.translator_service.forget_user(user_id)
+
+    def counts(self):
+        with self._lock:
+            counts = {
+                "warn_counts": len(self._warn_counts),
+                "corr_counts": len(self._corr_counts),
+                "chat_sids": len(self._sids),
+            }
+        counts["user_languages"] = self.translator_service.user_count()
+        return counts
+
+    def _pair_room(self, user_id):
+        session = self.recording_service.chat_manager.get_session_by_user(user_id)
+        return f"pair:{session.session_id}" if session else None
+
+    def _bind(self, user_id, sid):
+        # remember the user's /chat connection and keep it in its current pair's room
+        room = self._pair_room(user_id)
+        with self._lock:
+            self._sids[user_id] = sid
+            joined = self._rooms.get(sid)
+            if room and joined != room:
+                self._rooms[sid] = room
+        if room and joined != room:
+            if joined:
+                self.leave_room(sid, joined)
+            self.enter_room(sid, room)
+
+    def _room_for(self, user_id):
+        # both partners' connections for a paired user, just the user's own otherwise
+        room = self._pair_room(user_id)
+        if room is None:
+            return self._sids.get(user_id)
+        partner_id = self.recording_service.chat_manager.get_partner_id(user_id)
+        for uid in (user_id, partner_id):
+            with self._lock:
+                sid = self._sids.get(uid)
+                bound = sid is None or self._rooms.get(sid) == room
+            if not bound:
+                self._bind(uid, sid)
+        return room
+
+    def on_join_chat(self, payload):
+        data = json.loads(payload) if isinstance(payload, str) else payload or {}
+        try:
+            user_id = int(data.get("userID"))
+        except Exception:
+            return
+        self._bind(user_id, request.sid)
+
+    def on_disconnect(self):
+        with self._lock:
+            self._rooms.pop(request.sid, None)
+            for user_id, sid in list(self._sids.items()):
+                if sid == request.sid:
+                    self._sids.pop(user_id, None)
 
     def on_set_language(self, payload):
         try:
@@ -30,20 +112,21 @@ class ChatNamespace(Namespace):
 
     def on_message(self, message):
         msg_obj = json.loads(message) if isinstance(message, str) else message
+        self.recording_service.registry.touch(int(msg_obj.get("userID")))
+        self._bind(int(msg_obj.get("userID")), request.sid)
+        # one user's messages must reach the room in the order they were sent
+        self.pipeline.submit_ordered(int(msg_obj.get("userID")), self._process_message, msg_obj)
+
+    def _process_message(self, msg_obj):
         msg = str(msg_obj.get("msg", ""))
         user_id = int(msg_obj.get("userID"))
         username = str(msg_obj.get("username", ""))
         msg_time = str(msg_obj.get("msgTime", ""))
-        pred = self.sentiment_service.analyze(msg)
+        pred = self.sentiment_service.analyze(msg, final=True)
         translations = self.translator_service.build_translations_map(msg)
         payload = {
             "pred": True,
-            "values": {
-                "neg": float(pred[0][0]),
-                "neu": float(pred[0][1]),
-                "pos": float(pred[0][2]),
-                "predicted": ["negative", "neutral", "positive"][int(pred[1])]
-            },
+            "values": self._sentiment_values(pred),
             "isTyping": False,
             "msg": msg,
             "userID": user_id,
@@ -51,46 +134,65 @@ class ChatNamespace(Namespace):
             "msgTime": msg_time,
             "translations": translations
         }
-        emit("message", json.dumps(payload), broadcast=True)
+        room = self._room_for(user_id)
+        if room is not None:
+            self.emit("message", json.dumps(payload), room=room)
+
+    def _sentiment_values(self, pred):
+        values = {
+            "neg": float(pred[0][0]),
+            "neu": float(pred[0][1]),
+            "pos": float(pred[0][2]),
+            "predicted": ["negative", "neutral", "positive"][int(pred[1])]
+        }
+        if len(pred) > 2:
+            values["tier"] = pred[2]
+        return values
 
     def on_typing(self, raw):
         obj = json.loads(raw) if isinstance(raw, str) else raw
         msg = str(obj.get("msg", ""))
         if not msg.strip():
             return
-        text_en = self.translator_service.text_for_bert(msg)
+        self.recording_service.registry.touch(int(obj.get("userID")))
+        self._bind(int(obj.get("userID")), request.sid)
+        # older keystrokes of the same user that have not started yet are dropped
+        self.typing_coalescer.submit(int(obj.get("userID")), (obj, request.sid))
+
+    def _process_typing(self, state):
+        obj, sid = state
+        msg = str(obj.get("msg", ""))
+        text_en = self.translator_service.text_for_bert(msg, final=False)
         final_msg = text_en if text_en and text_en != "PLEASE SELECT TWO DISTINCT LANGUAGES" else msg
         user_id = int(obj.get("userID"))
         is_typing = bool(obj.get("isTyping"))
         print(f"[typing] user={user_id} isTyping={is_typing} msg='{final_msg}'")
         data = {"pred": False, "values": {}, "isTyping": is_typing, "msg": final_msg, "userID": user_id}
 
-        pred = self.sentiment_service.analyze(final_msg)
-        values = {
-            "neg": float(pred[0][0]),
-            "neu": float(pred[0][1]),
-            "pos": float(pred[0][2]),
-            "predicted": ["negative", "neutral", "positive"][int(pred[1])]
-        }
+        pred = self.sentiment_service.analyze(final_msg, final=False)
+        values = self._sentiment_values(pred)
         data.update({"pred": True, "values": values})
         self.recording_service.update_sentiment(user_id, values)
-        if float(values["neg"]) >= 0.31:
+        if float(values["neg"]) >= self.alert_threshold:
             print(f"[typing] user={user_id} sentiment={values}")
-            self._warn_counts[user_id] = self._warn_counts.get(user_id, 0) + 1
+            with self._lock:
+                warnings = self._warn_counts[user_id] = self._warn_counts.get(user_id, 0) + 1
             self.recording_service.logger_manager.log_chat_event(
                 user_id=user_id,
-                warnings_count=self._warn_counts[user_id],
+                warnings_count=warnings,
             )
-            emit("alert_user_typing", json.dumps({"msg": "You are typing negative words!"}), room=request.sid)
-        emit("user_typing", json.dumps(data), broadcast=True)
+            self.emit("alert_user_typing", json.dumps({"msg": "You are typing negative words!"}), room=sid)
+        self.emit("user_typing", json.dumps(data), room=self._room_for(user_id) or sid)
 
     def on_correction(self, raw):
         obj = json.loads(raw) if isinstance(raw, str) else raw
         user_id = int(obj.get("userID"))
-        self._corr_counts[user_id] = int(obj.get("correctionsCount"))
+        corrections = int(obj.get("correctionsCount"))
+        with self._lock:
+            self._corr_counts[user_id] = corrections
         self.recording_service.logger_manager.log_chat_event(
             user_id=user_id,
-            corrections_count=self._corr_counts[user_id],
+            corrections_count=corrections,
         )
         emit("correction_acknowledged", json.dumps({"msg": "Correction noted. Warning count reset."}), room=request.sid)
     
@@ -107,8 +209,9 @@ class ChatNamespace(Namespace):
         partner_id = self.recording_service.chat_manager.get_partner_id(user_id)
         print(f'[chat] enable_analysis enable={enabled} user={user_id} partner={partner_id} sid={request.sid}')
 
+        self._bind(user_id, request.sid)
         if partner_id:
-            emit('enable_analysis', {'userID': partner_id, 'enabled': enabled}, broadcast=True)
+            emit('enable_analysis', {'userID': partner_id, 'enabled': enabled}, room=self._room_for(user_id))
         else:
             print(f'[chat] enable_analysis no partner for user={user_id}')
 
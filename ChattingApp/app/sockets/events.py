@@ -5,8 +5,16 @@ class EventsNamespace(Namespace):
     def __init__(self, namespace, recording_service):
         super().__init__(namespace)
         self.recording_service = recording_service
-        self._sending_active = set()  # int user_id
-        self._viewing_active = set()  # int user_id
+        self._sending_active = recording_service.state.set("sending_active")  # int user_id
+        self._viewing_active = recording_service.state.set("viewing_active")  # int user_id
+        self.recording_service.registry.register("events", self.release_user, counts=self.counts)
+
+    def release_user(self, user_id):
+        self._sending_active.discard(user_id)
+        self._viewing_active.discard(user_id)
+
+    def counts(self):
+        return {"sending_active": len(self._sending_active), "viewing_active": len(self._viewing_active)}
 
     def on_start_viewing(self, data):
         data = json.loads(data) if isinstance(data, str) else data
@@ -1,13 +1,20 @@
 from flask_socketio import Namespace, emit
 from flask import request
 import json
+import time
+from app.services.matchmaking import MatchmakingQueue
 from app.services.recording import RecordingService
+from app.services.work_pipeline import WorkPipeline
 
 class RecordingNamespace(Namespace):
-    def __init__(self, namespace, recording_service: RecordingService):
+    def __init__(self, namespace, recording_service: RecordingService, matchmaking: MatchmakingQueue | None = None,
+                 pipeline: WorkPipeline | None = None):
         super().__init__(namespace)
         self.recording_service = recording_service
-        self.waiting = []
+        self.waiting = matchmaking or MatchmakingQueue()
+        # frames are decoded and analysed here, so no handler waits on the emotion batcher or
+        # a frame worker process (None: in the handler)
+        self.pipeline = pipeline
 
     def on_start_recording(self, data):
         data = json.loads(data) if isinstance(data, str) else data
@@ -15,10 +22,12 @@ class RecordingNamespace(Namespace):
         username = data.get('username') or f'User-{user_id}'
         print(f'[recording] start_recording user={user_id} sid={request.sid}')
         self.recording_service.start_session(user_id, request.sid)
+        # the sampler starts this session over at its minimum interval; sync the client's capture timer
+        interval = self.recording_service.frame_sampler.interval(user_id)
+        emit('frame_interval', {'userID': user_id, 'intervalMs': round(interval * 1000)}, room=request.sid)
 
-        self.waiting = [w for w in self.waiting if w.get('sid') != request.sid]
-        if self.waiting:
-            partner = self.waiting.pop(0)
+        partner = self.waiting.match_or_enqueue(request.sid, user_id, username)
+        if partner:
             print(f'[recording] pairing {user_id} <-> {partner["user_id"]}')
             self.recording_service.pair_users(user_id, username, partner['user_id'], partner['username'])
             emit('paired', {'partnerID': partner['user_id'], 'partnerName': partner['username']}, room=request.sid)
@@ -26,22 +35,41 @@ class RecordingNamespace(Namespace):
             emit('recording_started', {'userID': user_id}, room=request.sid)
             emit('recording_started', {'userID': partner['user_id']}, room=partner['sid'])
         else:
-            self.waiting.append({'sid': request.sid, 'user_id': user_id, 'username': username})
             print(f'[recording] queued user={user_id}; waiting size={len(self.waiting)}')
             emit('waiting_for_partner', {'message': 'Waiting for another user to join...'}, room=request.sid)
 
     def on_frame(self, data):
         obj = json.loads(data) if isinstance(data, str) else data
         user_id = int(obj.get('userID'))
-        frame_b64 = obj.get('frame', '')
-        self.recording_service.ingest_frame_b64(user_id, request.sid, frame_b64)
+        frame = obj.get('frame', '')
+        sid = request.sid
+        # binary attachment: raw JPEG bytes, no base64 / data-URL unpacking
+        b64 = not isinstance(frame, (bytes, bytearray, memoryview))
+        if not self.recording_service.admit_frame(user_id, sid):
+            return
+        if self.pipeline is None:
+            self._frame_done(user_id, sid, self.recording_service.ingest_admitted(user_id, frame, b64))
+            return
+        self.pipeline.submit(self.recording_service.ingest_admitted, user_id, frame, b64, time.perf_counter(),
+                             on_done=lambda interval: self._frame_done(user_id, sid, interval))
+
+    def _frame_done(self, user_id, sid, interval):
+        if interval is not None:
+            # server is behind (or caught up): let the client capture at the rate that is kept
+            self.emit('frame_interval', {'userID': user_id, 'intervalMs': round(interval * 1000)}, room=sid)
 
     def on_stop_recording(self, data):
         data = json.loads(data) if isinstance(data, str) else data
         user_id = int(data.get('userID'))
         print(f'[recording] stop_recording user={user_id} sid={request.sid}')
 
-        saved = self.recording_service.stop_session(user_id)
+        sid = request.sid
+
+        def on_saved(job_id, files):
+            # runs on the persistence worker once the Excel file is written
+            self.emit('session_saved', {'userID': user_id, 'jobId': job_id, 'saved_files': files or []}, room=sid)
+
+        job_id = self.recording_service.stop_session(user_id, on_saved=on_saved)
 
         partner_id = self.recording_service.logger_manager.partners.get(user_id)
         partner_sid = None
@@ -53,7 +81,7 @@ class RecordingNamespace(Namespace):
             except Exception:
                 pass
 
-        emit('recording_stopped', {'userID': user_id, 'saved_files': saved}, room=request.sid)
+        emit('recording_stopped', {'userID': user_id, 'jobId': job_id, 'saved_files': []}, room=request.sid)
         if partner_sid:
             emit('recording_stopped', {'userID': partner_id, 'saved_files': []}, room=partner_sid)
 
@@ -63,5 +91,7 @@ class RecordingNamespace(Namespace):
         self.recording_service.update_current_message(user_id, message)
 
     def on_disconnect(self):
-        self.waiting = [w for w in self.waiting if w.get('sid') != request.sid]
+        # the user's state is released once it has stayed disconnected for SESSION_DISCONNECT_TTL_S
+        self.recording_service.registry.disconnected(request.sid)
+        self.waiting.remove(request.sid)
         print(f'[recording] disconnect sid={request.sid}, waiting size={len(self.waiting)}')
\ No newline at end of file
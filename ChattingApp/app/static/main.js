@@ -125,6 +125,8 @@ Swal.fire({
 
 chatSocket.on('connect', function() {
     console.log('Connected to chat');
+    // chat events are delivered to the pair's room; tell the server which user this connection is
+    chatSocket.emit('join_chat', { userID: userID });
 });
 
 chatSocket.on('message', function(payload) {
@@ -469,7 +471,10 @@ function ensureVideoEl() {
   return v;
 }
 
-let mediaStream, frameTimer;
+let mediaStream, frameTimer, captureFrame;
+// the server's minimum interval; it only tells us when it moves away from that
+const DEFAULT_FRAME_INTERVAL_MS = 400;
+let frameIntervalMs = DEFAULT_FRAME_INTERVAL_MS;
 function ensureMediaDevices() {
   if (!navigator.mediaDevices) navigator.mediaDevices = {};
   if (!navigator.mediaDevices.getUserMedia) {
@@ -509,13 +514,22 @@ async function startCameraAndStreaming() {
     const ctx = canvas.getContext('2d', { willReadFrequently: true });
 
     if (frameTimer) clearInterval(frameTimer);
-    frameTimer = setInterval(() => {
-      if (!v || v.readyState < 2 || !v.videoWidth || !v.videoHeight) return;
+    let encoding = false;
+    captureFrame = () => {
+      if (encoding || !v || v.readyState < 2 || !v.videoWidth || !v.videoHeight) return;
       canvas.width = v.videoWidth; canvas.height = v.videoHeight;
       ctx.drawImage(v, 0, 0, canvas.width, canvas.height);
-      const frame = canvas.toDataURL('image/jpeg', 0.6);
-      recordingSocket.emit('frame', JSON.stringify({ userID, frame }));
-    }, 400);
+      // raw JPEG as a binary attachment (no base64 / JSON string wrapping)
+      encoding = true;
+      canvas.toBlob(async (blob) => {
+        try {
+          if (blob) recordingSocket.emit('frame', { userID, frame: await blob.arrayBuffer() });
+        } finally {
+          encoding = false;
+        }
+      }, 'image/jpeg', 0.6);
+    };
+    frameTimer = setInterval(captureFrame, frameIntervalMs);
     console.log('[camera] streaming started', v.videoWidth, 'x', v.videoHeight);
   } catch (err) {
     console.error('getUserMedia failed:', err);
@@ -526,12 +540,26 @@ async function startCameraAndStreaming() {
 function stopCameraAndStreaming() {
   if (frameTimer) clearInterval(frameTimer);
   frameTimer = null;
+  captureFrame = null;
+  // the next session starts over at the minimum (the server also says so on start_recording)
+  frameIntervalMs = DEFAULT_FRAME_INTERVAL_MS;
   if (mediaStream) {
     mediaStream.getTracks().forEach(t => t.stop());
     mediaStream = null;
   }
 }
 
+// server-side frame interval (grows when frame analysis falls behind)
+recordingSocket.on('frame_interval', function(data) {
+  const ms = Number(data && data.intervalMs);
+  if (!ms || ms === frameIntervalMs) return;
+  frameIntervalMs = ms;
+  if (frameTimer && captureFrame) {
+    clearInterval(frameTimer);
+    frameTimer = setInterval(captureFrame, frameIntervalMs);
+  }
+});
+
 let waitingOpen = false;
 recordingSocket.on('waiting_for_partner', function(data) {
   if (waitingOpen) return;
@@ -547,6 +575,7 @@ recordingSocket.on('waiting_for_partner', function(data) {
 
 recordingSocket.on('paired', function(data) {
   console.log('Paired with:', data.partnerName || data.partnerID);
+  chatSocket.emit('join_chat', { userID: userID });
 });
 
 recordingSocket.on('recording_started', function(data) {
@@ -562,6 +591,10 @@ recordingSocket.on('recording_stopped', function(data) {
   stopCameraAndStreaming();
 });
 
+recordingSocket.on('session_saved', function(data) {
+  console.log('[recording] session saved', data && data.saved_files);
+});
+
 recordingSocket.on('connect', () => console.log('[recording] connected'));
 recordingSocket.on('disconnect', () => console.log('[recording] disconnected'));
 
@@ -0,0 +1,151 @@
+import json
+import os
+import re
+from typing import Dict
+
+
+class TranslationBackend:
+    """Creates the translator TranslatorService uses for one target language.
+
+    `create(lang)` returns an object with `translate(text) -> str`, or None when the
+    backend cannot translate into `lang`. `remote` backends make network calls: their
+    results are cached, they run under the fan-out deadline and behind a circuit
+    breaker. Local ones are called inline.
+    """
+
+    name = "base"
+    remote = False
+
+    def create(self, lang: str):
+        raise NotImplementedError
+
+
+class TranslationProviderError(Exception):
+    """The provider answered with an error or quota message instead of a translation."""
+
+
+class CheckedTranslator:
+    """Wraps a provider translator and raises on the messages it returns in place of text.
+
+    The `translate` package's default provider (MyMemory) answers quota and request
+    errors with a normal string such as "MYMEMORY WARNING: YOU USED ALL AVAILABLE FREE
+    TRANSLATIONS FOR TODAY...". Raising makes TranslatorService count it as a failure
+    and keeps it out of the cache.
+    """
+
+    ERROR_MARKERS = (
+        "MYMEMORY WARNING",
+        "QUERY LENGTH LIMIT EXCEEDED",
+        "INVALID LANGUAGE PAIR",
+        "PLEASE SELECT TWO DISTINCT LANGUAGES",
+        "IS AN INVALID TARGET LANGUAGE",
+        "IS AN INVALID SOURCE LANGUAGE",
+        "NO QUERY SPECIFIED",
+    )
+
+    def __init__(self, translator):
+        self.translator = translator
+
+    @classmethod
+    def is_error(cls, text) -> bool:
+        upper = (text or "").upper()
+        return any(marker in upper for marker in cls.ERROR_MARKERS)
+
+    def translate(self, text: str) -> str:
+        translated = self.translator.translate(text)
+        if self.is_error(translated) and not self.is_error(text):
+            raise TranslationProviderError(translated[:200])
+        return translated
+
+
+class OnlineTranslationBackend(TranslationBackend):
+    """The `translate` package's online provider (optional dependency)."""
+
+    name = "online"
+    remote = True
+
+    def __init__(self, from_lang: str = "autodetect"):
+        self.from_lang = from_lang
+
+    @staticmethod
+    def available() -> bool:
+        try:
+            import translate  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def create(self, lang):
+        from translate import Translator
+        return CheckedTranslator(Translator(to_lang=lang, from_lang=self.from_lang))
+
+
+class PhraseTable:
+    """Greedy longest-match phrase lookup; text it has no entry for is kept as is."""
+
+    _word = re.compile(r"\w+")
+
+    def __init__(self, phrases: Dict[str, str]):
+        self.phrases = {" ".join(self._word.findall(k.lower())): v for k, v in phrases.items()}
+        self.phrases.pop("", None)
+        self.max_words = max((k.count(" ") + 1 for k in self.phrases), default=0)
+
+    def translate(self, text: str) -> str:
+        words = list(self._word.finditer(text))
+        out, last, i = [], 0, 0
+        while i < len(words):
+            for n in range(min(self.max_words, len(words) - i), 0, -1):
+                phrase = self.phrases.get(" ".join(w.group().lower() for w in words[i:i + n]))
+                if phrase is not None:
+                    if words[i].group()[0].isupper():
+                        phrase = phrase[:1].upper() + phrase[1:]
+                    out.append(text[last:words[i].start()])
+                    out.append(phrase)
+                    last = words[i + n - 1].end()
+                    i += n
+                    break
+            else:
+                i += 1
+        out.append(text[last:])
+        return "".join(out)
+
+
+class PhraseTableBackend(TranslationBackend):
+    """In-process dictionary translation: no network, deterministic.
+
+    Tables map source phrases (any source language, matched case-insensitively on
+    words) to the target language. They come from `tables` and/or `<lang>.json` files
+    in `directory`; a language with no table gets no translator.
+    """
+
+    name = "local"
+
+    def __init__(self, tables: Dict[str, Dict[str, str]] | None = None, directory: str | None = None):
+        self.tables = {lang: dict(t) for lang, t in (tables or {}).items()}
+        self.directory = directory
+
+    def _load(self, lang):
+        phrases = {}
+        if self.directory:
+            path = os.path.join(self.directory, f"{lang}.json")
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    phrases.update(json.load(f))
+        phrases.update(self.tables.get(lang, {}))
+        return phrases
+
+    def create(self, lang):
+        phrases = self._load(lang)
+        return PhraseTable(phrases) if phrases else None
+
+
+def create_translation_backend(kind: str | None = None, phrase_table_dir: str | None = None) -> TranslationBackend:
+    # kind None: the online provider when the `translate` package is installed, the phrase tables otherwise
+    if kind is None:
+        kind = "online" if OnlineTranslationBackend.available() else "local"
+    if kind == "online":
+        return OnlineTranslationBackend()
+    elif kind == "local":
+        return PhraseTableBackend(directory=phrase_table_dir)
+    else:
+        raise ValueError(f"Unknown translation backend: {kind}")
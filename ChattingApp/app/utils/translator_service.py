@@ -1,64 +1,208 @@
-from translate import Translator
 import threading
-from functools import lru_cache
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import Dict, Set
+from app.config.config import Config
+from app.services.translation_cache import TranslationCache
+from app.services.circuit_breaker import CircuitBreaker
+from app.utils.translation_backends import TranslationBackend, create_translation_backend
 
 class TranslatorService:
-    def __init__(self, supported: Set[str] | None = None):
+    def __init__(self, supported: Set[str] | None = None, cache: TranslationCache | None = None,
+                 max_workers: int = 8, deadline_s: float = 1.5, breaker_failures: int = 3,
+                 breaker_cooldown_s: float = 30.0, backend: TranslationBackend | None = None,
+                 backends: Dict[str, TranslationBackend] | None = None):
         self.supported = supported or {"en","ar", "es", "fr"}
+        # per-language backends over the default one; without the `translate` package
+        # the default is the local phrase tables
+        self.backend = backend or create_translation_backend(None, Config.PHRASE_TABLE_DIR)
+        self.backends: Dict[str, TranslationBackend] = dict(backends or {})
         self._user_lang: Dict[int, str] = {}
-        self._lang_translators: Dict[str, Translator] = {}
+        self._lang_translators: Dict[str, object] = {}
         self._lock = threading.Lock()
+        # keyed by (lang, text): language changes never invalidate it
+        self.cache = cache or TranslationCache()
+        # a message's languages are translated in parallel; whatever is not back after
+        # deadline_s goes out untranslated (and still lands in the cache when it finishes)
+        self.deadline_s = deadline_s
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix="translate")
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown_s = breaker_cooldown_s
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._timings: Dict[str, dict] = {}  # lang -> counters + recent latencies
 
     def set_language(self, user_id: int, lang: str | None):
         lang = (lang or "").lower()
         with self._lock:
-            prev = self._user_lang.get(user_id, "")
             if lang in self.supported:
                 self._user_lang[user_id] = lang
                 if lang not in self._lang_translators:
-                    self._lang_translators[lang] = Translator(to_lang=lang, from_lang="autodetect")
+                    self._create_translator(lang)
             else:
                 self._user_lang[user_id] = ""
-            if prev != self._user_lang[user_id]:
-                self._translate_cached.cache_clear()
 
     def get_language(self, user_id: int) -> str:
         return self._user_lang.get(user_id, "")
+
+    def user_count(self) -> int:
+        # users with a language set (or cleared) who have not been forgotten yet
+        with self._lock:
+            return len(self._user_lang)
+
+    def forget_user(self, user_id: int):
+        with self._lock:
+            self._user_lang.pop(user_id, None)
     
+    def _backend_for(self, lang: str) -> TranslationBackend:
+        return self.backends.get(lang, self.backend)
+
+    def _create_translator(self, lang: str):
+        # caller holds self._lock
+        try:
+            tr = self._backend_for(lang).create(lang)
+        except Exception as e:
+            print(f"[translator] no {self._backend_for(lang).name} translator for {lang}: {e}")
+            return
+        if tr is not None:
+            self._lang_translators[lang] = tr
+
     def _ensure_translator(self, lang: str):
       with self._lock:
         if lang in self.supported and lang not in self._lang_translators:
-          self._lang_translators[lang] = Translator(to_lang=lang, from_lang="autodetect")
+          self._create_translator(lang)
 
-    def translate_to(self, lang: str, text: str) -> str:
+    def translate_to(self, lang: str, text: str, final: bool = True) -> str:
       if not text:
           return text
       lang = (lang or "").lower()
       if lang == "en":
           self.supported.add("en")
           self._ensure_translator("en")
-      return self._translate_cached(lang, text)
+      return self._translate_cached(lang, text, final)
 
-    def text_for_bert(self, text: str) -> str:
-      t = self.translate_to("en", text or "")
+    def text_for_bert(self, text: str, final: bool = True) -> str:
+      # final=False (typing prefixes): cached in memory only, never written to the cache file
+      t = self.translate_to("en", text or "", final)
       return t or (text or "")
 
     def build_translations_map(self, text: str) -> Dict[str, str]:
       langs = self._active_languages_snapshot() | {"en"}
-      return {lang: self._translate_cached(lang, text) for lang in langs}
+      if not text:
+          return {lang: text for lang in langs}
+      out, pending = {}, {}
+      for lang in langs:
+          if not self._backend_for(lang).remote:
+              out[lang] = self._translate_local(lang, text)
+              continue
+          cached = self.cache.get(lang, text)
+          if cached is not None:
+              out[lang] = cached
+          else:
+              pending[self._executor.submit(self._translate_uncached, lang, text)] = lang
+      if pending:
+          done, late = wait(pending, timeout=self.deadline_s)
+          for f in done:
+              out[pending[f]] = f.result()
+          for f in late:
+              f.cancel()
+              out[pending[f]] = text
+              self._record(pending[f], "timeouts")
+      return out
 
     def _active_languages_snapshot(self) -> Set[str]:
         with self._lock:
             return {l for l in self._user_lang.values() if l}
 
-    @lru_cache(maxsize=4096)
-    def _translate_cached(self, lang: str, text: str) -> str:
+    def _translate_cached(self, lang: str, text: str, final: bool = True) -> str:
+        if not self._backend_for(lang).remote:
+            return self._translate_local(lang, text)
+        cached = self.cache.get(lang, text)
+        if cached is not None:
+            return cached
+        return self._translate_uncached(lang, text, final)
+
+    def _record(self, lang: str, counter: str, elapsed: float | None = None):
+        with self._lock:
+            t = self._timings.get(lang)
+            if t is None:
+                t = self._timings[lang] = {"calls": 0, "errors": 0, "slow": 0, "timeouts": 0, "skipped": 0,
+                                           "latencies": deque(maxlen=200)}
+            t[counter] += 1
+            if elapsed is not None:
+                t["latencies"].append(elapsed)
+
+    def _translate_local(self, lang: str, text: str) -> str:
+        # in-process backends: cheaper than a cache lookup, no deadline or breaker needed
         with self._lock:
             tr = self._lang_translators.get(lang)
         if not tr:
             return text
+        start = time.perf_counter()
         try:
-            return tr.translate(text) or text
+            translated = tr.translate(text)
         except Exception:
+            translated = None
+        self._record(lang, "calls", time.perf_counter() - start)
+        if not translated:
+            self._record(lang, "errors")
             return text
+        return translated
+
+    def _translate_uncached(self, lang: str, text: str, final: bool = True) -> str:
+        with self._lock:
+            tr = self._lang_translators.get(lang)
+            breaker = self._breakers.get(lang)
+            if tr and breaker is None:
+                breaker = self._breakers[lang] = CircuitBreaker(self.breaker_failures, self.breaker_cooldown_s)
+        # fallbacks (no translator for lang yet, open breaker, translator errors) are not cached
+        if not tr:
+            return text
+        if not breaker.allow():
+            self._record(lang, "skipped")
+            return text
+        start = time.perf_counter()
+        try:
+            translated = tr.translate(text)
+        except Exception:
+            translated = None
+        elapsed = time.perf_counter() - start
+        self._record(lang, "calls", elapsed)
+        if not translated:
+            self._record(lang, "errors")
+            breaker.failure()
+            return text
+        # a backend that only answers after the deadline is as good as down for chat messages
+        if elapsed > self.deadline_s:
+            self._record(lang, "slow")
+            breaker.failure()
+        else:
+            breaker.success()
+        self.cache.put(lang, text, translated, persist=final)
+        return translated
+
+    def close(self):
+        # shutdown: translations still queued are dropped, running ones are not waited for
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            timings = {lang: dict(t, latencies=list(t["latencies"])) for lang, t in self._timings.items()}
+            breakers = dict(self._breakers)
+        out = {}
+        for lang, t in timings.items():
+            backend = self._backend_for(lang)
+            latencies = sorted(t["latencies"])
+            breaker = breakers.get(lang)
+            out[lang] = {
+                "backend": backend.name,
+                "calls": t["calls"],
+                "errors": t["errors"],
+                "slow": t["slow"],
+                "timeouts": t["timeouts"],
+                "skipped": t["skipped"],
+                "avg_ms": sum(latencies) / len(latencies) * 1000.0 if latencies else 0.0,
+                "p95_ms": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] * 1000.0 if latencies else 0.0,
+                "breaker": breaker.stats() if breaker else None,
+            }
+        return {"deadline_s": self.deadline_s, "languages": out}
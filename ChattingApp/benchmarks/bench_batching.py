@@ -0,0 +1,76 @@
+import sys
+import pathlib
+# allow: `python benchmarks/bench_batching.py`
+if __package__ in (None, "",):
+    ROOT = pathlib.Path(__file__).resolve().parents[1]
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+
+import argparse
+import threading
+import time
+
+from app.services.inference_batcher import InferenceBatcher
+
+
+class StubModel:
+    # fixed per-call overhead + small per-item cost, roughly the shape of Keras predict();
+    # the lock serialises forward passes the way a single loaded model does
+    def __init__(self, call_overhead_ms=20.0, per_item_ms=0.5):
+        self.call_overhead_s = call_overhead_ms / 1000.0
+        self.per_item_s = per_item_ms / 1000.0
+        self._lock = threading.Lock()
+
+    def predict_batch(self, texts):
+        with self._lock:
+            time.sleep(self.call_overhead_s + self.per_item_s * len(texts))
+        return [[(0.1, 0.8, 0.1), 1] for _ in texts]
+
+    def predict(self, text):
+        return self.predict_batch([text])[0]
+
+
+def run(model, clients, requests_per_client):
+    def worker():
+        for i in range(requests_per_client):
+            model.predict(f"message {i}")
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return clients * requests_per_client / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--bert", action="store_true", help="use the real BertModel instead of a stub")
+    args = parser.parse_args()
+
+    if args.bert:
+        from app.config.config import Config
+        from app.models.bert_model import BertModel
+        model = BertModel(Config.MODEL_PATH, Config.TOKENIZER_PATH)
+    else:
+        model = StubModel()
+
+    for clients in args.clients:
+        direct = run(model, clients, args.requests)
+        batcher = InferenceBatcher(model, args.max_batch, args.window_ms)
+        batched = run(batcher, clients, args.requests)
+        s = batcher.stats()
+        batcher.close()
+        print(f"clients={clients:3d} direct={direct:8.1f} req/s batched={batched:8.1f} req/s "
+              f"avg_batch={s['avg_batch_size']:.1f} fill={s['avg_batch_fill']:.2f} "
+              f"avg_wait={s['avg_queue_wait_ms']:.2f}ms max_wait={s['max_queue_wait_ms']:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import sys
+import pathlib
+# allow: `python benchmarks/bench_bert_inference.py`
+if __package__ in (None, "",):
+    ROOT = pathlib.Path(__file__).resolve().parents[1]
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+
+import argparse
+import os
+import time
+
+# benchmark CPU inference only
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+
+from app.config.config import Config
+from app.models.bert_model import BertModel
+
+SAMPLES = [
+    "hi",
+    "how are you doing today?",
+    "I really did not like what you said earlier, it was rude",
+    "thanks, that was helpful :)",
+]
+
+
+def bench(model, batch_size, iters, eager, pad_to):
+    texts = [SAMPLES[i % len(SAMPLES)] for i in range(batch_size)]
+    txt_, txt_mask = model.tokenize_2([model.normalize(t) for t in texts], pad_to=pad_to)
+    model.forward(txt_, txt_mask, eager=eager)  # warm-up / trace
+
+    latencies = []
+    for _ in range(iters):
+        start = time.perf_counter()
+        model.forward(txt_, txt_mask, eager=eager)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        "p50_ms": latencies[len(latencies) // 2] * 1000.0,
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000.0,
+        "throughput": batch_size * iters / total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--iters", type=int, default=30)
+    args = parser.parse_args()
+
+    model = BertModel(Config.MODEL_PATH, Config.TOKENIZER_PATH, graph_inference=True)
+    for batch_size in args.batch_sizes:
+        paths = (
+            ("keras predict", True, model.MAX_LEN),
+            ("tf.function", False, model.MAX_LEN),
+            ("tf.function+bucket", False, None),
+        )
+        for name, eager, pad_to in paths:
+            r = bench(model, batch_size, args.iters, eager, pad_to)
+            print(f"batch={batch_size:3d} {name:18s} p50={r['p50_ms']:8.2f}ms "
+                  f"p95={r['p95_ms']:8.2f}ms throughput={r['throughput']:8.1f} texts/s")
+
+
+if __name__ == "__main__":
+    main()
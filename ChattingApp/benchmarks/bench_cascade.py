@@ -0,0 +1,73 @@
+import sys
+import pathlib
+# allow: `python benchmarks/bench_cascade.py`
+if __package__ in (None, "",):
+    ROOT = pathlib.Path(__file__).resolve().parents[1]
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+
+import argparse
+import time
+
+from app.config.config import Config
+from app.models.bert_model import BertModel
+from app.models.lexicon_model import LexiconModel
+from app.services.message_strategy import BertSentimentStrategy, CascadeSentimentStrategy
+
+SENTENCES = [
+    "hey, how is your day going?",
+    "that was a really good idea, thank you",
+    "I think you are completely wrong about this",
+    "stop being so stupid and listen to me",
+    "I hate when people ignore my messages",
+    "can we meet tomorrow at the library?",
+    "you are annoying and I am tired of this",
+    "great job on the presentation, it was awesome",
+    "this is the worst group project ever",
+    "no worries, take your time",
+]
+
+
+def typing_events(sentences):
+    # every word boundary of every sentence, the way on_typing sees a message being written
+    for sentence in sentences:
+        words = sentence.split()
+        for i in range(1, len(words) + 1):
+            yield " ".join(words[:i])
+
+
+def run(strategy, events, threshold):
+    alerts = []
+    start = time.perf_counter()
+    for text in events:
+        pred = strategy.predict(text, final=False)
+        alerts.append(float(pred[0][0]) >= threshold)
+    return alerts, (time.perf_counter() - start) / len(events)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--margin", type=float, nargs="+", default=[0.05, Config.CASCADE_MARGIN, 0.25])
+    args = parser.parse_args()
+
+    threshold = Config.SENTIMENT_ALERT_THRESHOLD
+    bert = BertModel(Config.MODEL_PATH, Config.TOKENIZER_PATH)
+    lexicon = LexiconModel()
+    events = list(typing_events(SENTENCES))
+    bert.predict(events[0])  # warm-up / trace
+
+    baseline, bert_latency = run(BertSentimentStrategy(bert), events, threshold)
+    print(f"bert-only          events={len(events)} alerts={sum(baseline)} avg={bert_latency * 1000:8.3f}ms")
+    for margin in args.margin:
+        cascade = CascadeSentimentStrategy(bert, lexicon, threshold=threshold, margin=margin)
+        alerts, latency = run(cascade, events, threshold)
+        agree = sum(a == b for a, b in zip(alerts, baseline)) / len(events)
+        missed = sum(b and not a for a, b in zip(alerts, baseline))
+        extra = sum(a and not b for a, b in zip(alerts, baseline))
+        s = cascade.stats()
+        print(f"cascade margin={margin:.2f} alerts={sum(alerts)} agreement={agree:.3f} missed={missed} "
+              f"extra={extra} lexicon_share={s['lexicon_share']:.2f} avg={latency * 1000:8.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import sys
+import pathlib
+# allow: `python benchmarks/bench_emotion_engine.py`
+if __package__ in (None, "",):
+    ROOT = pathlib.Path(__file__).resolve().parents[1]
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from app.models.deepface_model import DeepFaceEmotionModel
+from app.services.inference_batcher import InferenceBatcher
+
+
+def run(model, users, faces_per_user, face):
+    # one thread per user, the way concurrent socket handlers call process_frame
+    def worker():
+        for _ in range(faces_per_user):
+            model.predict(face)
+
+    threads = [threading.Thread(target=worker) for _ in range(users)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return users * faces_per_user / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 32])
+    parser.add_argument("--faces", type=int, default=20, help="faces per user")
+    parser.add_argument("--window-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    # detected crops come out of DeepFace.extract_faces as float RGB in [0, 1]
+    face = np.random.default_rng(0).random((180, 160, 3), dtype=np.float32)
+    model = DeepFaceEmotionModel()
+    lock = threading.Lock()
+
+    class Serial:
+        # one face per forward pass under a global lock, like the old DeepFace.analyze path
+        def predict(self, f):
+            with lock:
+                return model.predict(f)
+
+    model.predict(face)  # warm-up
+    for users in args.users:
+        line = f"users={users:3d} per-frame={run(Serial(), users, args.faces, face):8.1f} faces/s"
+        for batch_size in args.batch_sizes:
+            engine = InferenceBatcher(model, batch_size, args.window_ms, name="emotion-bench")
+            rate = run(engine, users, args.faces, face)
+            fill = engine.stats()["avg_batch_size"]
+            engine.close()
+            line += f" batch{batch_size}={rate:8.1f} faces/s (avg {fill:.1f})"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import sys
+import pathlib
+# allow: `python benchmarks/bench_frame_decode.py`
+if __package__ in (None, "",):
+    ROOT = pathlib.Path(__file__).resolve().parents[1]
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from app.services.frame_decode import DecodedFrame
+
+
+def make_jpeg(width, height, quality):
+    yy, xx = np.mgrid[0:height, 0:width]
+    img = np.stack([xx * 255 // width, yy * 255 // height, (xx + yy) % 256], axis=-1).astype(np.uint8)
+    img = cv2.add(img, np.random.default_rng(0).integers(0, 24, img.shape, dtype=np.uint8))
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buf.tobytes()
+
+
+def full_path(jpeg, box):
+    # before: full-resolution decode + whole-frame BGR->RGB, crop taken from that
+    frame = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    x, y, w, h = box
+    return rgb[y:y + h, x:x + w] / 255
+
+
+def reduced_path(jpeg, box, scale, min_face_px):
+    # after: reduced decode for detection, only the face ROI converted
+    frame = DecodedFrame.decode(jpeg, scale, min_face_px)
+    x, y, w, h = (v // scale for v in box)
+    return frame.face_crop(x, y, w, h)
+
+
+def per_frame_ms(fn, n):
+    fn()
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", nargs="+", default=["640x480", "1280x720", "1920x1080"])
+    parser.add_argument("--scales", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--face-frac", type=float, default=0.3, help="face box side as a fraction of frame height")
+    parser.add_argument("--min-face-px", type=int, default=48)
+    parser.add_argument("--quality", type=int, default=60)
+    parser.add_argument("-n", type=int, default=100)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        width, height = (int(v) for v in size.split("x"))
+        jpeg = make_jpeg(width, height, args.quality)
+        side = int(height * args.face_frac)
+        box = ((width - side) // 2, (height - side) // 2, side, side)
+
+        base = per_frame_ms(lambda: full_path(jpeg, box), args.n)
+        line = f"{size:>9} full={base:6.2f} ms"
+        for scale in args.scales:
+            ms = per_frame_ms(lambda: reduced_path(jpeg, box, scale, args.min_face_px), args.n)
+            full = "full-res crop" if side // scale < args.min_face_px else "reduced crop"
+            line += f"  1/{scale}={ms:6.2f} ms (saves {base - ms:5.2f} ms, {full})"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import sys
+import pathlib
+# allow: `python benchmarks/bench_frame_transport.py`
+if __package__ in (None, "",):
+    ROOT = pathlib.Path(__file__).resolve().parents[1]
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+
+import argparse
+import base64
+import json
+import time
+
+import cv2
+import numpy as np
+
+
+def make_jpeg(width, height, quality):
+    # smooth gradients + noise compress roughly like a webcam frame
+    yy, xx = np.mgrid[0:height, 0:width]
+    img = np.stack([xx * 255 // width, yy * 255 // height, (xx + yy) % 256], axis=-1).astype(np.uint8)
+    img = cv2.add(img, np.random.default_rng(0).integers(0, 24, img.shape, dtype=np.uint8))
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buf.tobytes()
+
+
+def decode_b64(payload):
+    # what on_frame + ingest_frame_b64 do with a JSON string carrying a data URL
+    obj = json.loads(payload)
+    frame_b64 = obj["frame"]
+    if "," in frame_b64:
+        frame_b64 = frame_b64.split(",", 1)[1]
+    return cv2.imdecode(np.frombuffer(base64.b64decode(frame_b64), dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def decode_binary(obj):
+    # what on_frame + ingest_frame_bytes do with a binary attachment
+    return cv2.imdecode(np.frombuffer(obj["frame"], dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def cpu_ms(fn, payload, n):
+    fn(payload)
+    start = time.process_time()
+    for _ in range(n):
+        fn(payload)
+    return (time.process_time() - start) / n * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", nargs="+", default=["640x480", "1280x720"])
+    parser.add_argument("--quality", type=int, default=60)
+    parser.add_argument("-n", type=int, default=200)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        width, height = (int(v) for v in size.split("x"))
+        jpeg = make_jpeg(width, height, args.quality)
+        text = json.dumps({"userID": 1, "frame": "data:image/jpeg;base64," + base64.b64encode(jpeg).decode()})
+        binary = {"userID": 1, "frame": jpeg}
+
+        b64_ms = cpu_ms(decode_b64, text, args.n)
+        bin_ms = cpu_ms(decode_binary, binary, args.n)
+        print(f"{size:>9}  base64: {len(text.encode()):7d} B/frame {b64_ms:6.2f} ms cpu"
+              f"  binary: {len(jpeg):7d} B/frame {bin_ms:6.2f} ms cpu"
+              f"  ({1 - len(jpeg) / len(text.encode()):.0%} fewer bytes)")
+
+
+if __name__ == "__main__":
+    main()
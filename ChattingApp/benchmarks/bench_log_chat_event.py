@@ -0,0 +1,115 @@
+import sys
+import pathlib
+# allow: `python benchmarks/bench_log_chat_event.py`
+if __package__ in (None, "",):
+    ROOT = pathlib.Path(__file__).resolve().parents[1]
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+
+import argparse
+import time
+
+from app.services.logger import EMOTIONS
+from app.services.logger_manager import LoggerManager
+
+
+class RowDictLoggerManager(LoggerManager):
+    # the previous log_chat_event: user/partner row dicts built per event, re-expanded by Logger.log_event
+    def _locks(self, user_id, user_row):
+        if user_row.get("start_sending_time"):
+            if user_id in self._sending_active:
+                user_row.pop("start_sending_time", None)
+            else:
+                self._sending_active.add(user_id)
+        if user_row.get("end_sending_time"):
+            self._sending_active.discard(user_id)
+        if user_row.get("start_viewing_time"):
+            if user_id in self._viewing_active:
+                user_row.pop("start_viewing_time", None)
+            else:
+                self._viewing_active.add(user_id)
+        if user_row.get("end_viewing_time"):
+            self._viewing_active.discard(user_id)
+
+    def log_chat_event(self, user_id, individual_emotions=None, **shared_data):
+        user_id = int(user_id)
+        partner_id = self.partners.get(user_id)
+        status = shared_data.get("status", "")
+        user_logger = self.get_logger(user_id, self.user_names.get(user_id))
+        user_sent = self.recording_service.get_sentiment(user_id)
+        partner_sent = self.recording_service.get_sentiment(partner_id) if partner_id else None
+        user_row = {k: v for k, v in shared_data.items() if not k.startswith("partner_")}
+        user_row.setdefault("user_id", user_id)
+        user_row.setdefault("status", status)
+        if status == "receiver":
+            user_row.pop("message", None)
+            user_row.pop("complete_message", None)
+        self._locks(user_id, user_row)
+        if user_sent:
+            user_row.update({f"sentiment_{k}": user_sent.get(k, 0) for k in ("neg", "pos", "neu")})
+        partner_data_for_user = {}
+        if partner_id:
+            partner_data_for_user = {
+                "name": self.user_names.get(partner_id, ""),
+                "status": self._invert_status(status),
+                "message": shared_data.get("partner_message", shared_data.get("message", "") if status == "receiver" else ""),
+                "complete_message": shared_data.get("partner_complete_message", shared_data.get("complete_message", "") if status == "receiver" else ""),
+                "warnings_count": shared_data.get("partner_warnings_count", None),
+                "corrections_count": shared_data.get("partner_corrections_count", None),
+            }
+            partner_data_for_user = {k: v for k, v in partner_data_for_user.items() if v not in (None, "")}
+            if partner_sent:
+                partner_data_for_user.update({f"sentiment_{k}": partner_sent.get(k, 0) for k in ("neg", "pos", "neu")})
+        user_logger.log_event(emotion_dict=individual_emotions or {}, partner_data=partner_data_for_user, **user_row)
+        if partner_id:
+            partner_logger = self.get_logger(partner_id, self.user_names.get(partner_id))
+            fields = ("message", "complete_message", "warnings_count", "corrections_count",
+                      "start_sending_time", "end_sending_time", "total_sending_time",
+                      "start_viewing_time", "end_viewing_time", "total_viewing_time")
+            user_data_for_partner = {
+                "name": self.user_names.get(user_id, ""),
+                "status": status,
+                **{k: shared_data.get(k, "" if k in ("message", "complete_message") else None) for k in fields},
+                **{e: (individual_emotions or {}).get(e, 0) for e in EMOTIONS},
+            }
+            user_data_for_partner = {k: v for k, v in user_data_for_partner.items() if v not in (None, "")}
+            if user_sent:
+                user_data_for_partner.update({f"sentiment_{k}": user_sent.get(k, 0) for k in ("neg", "pos", "neu")})
+            partner_logger.log_event(emotion_dict={}, partner_data=user_data_for_partner,
+                                     user_id=partner_id, status=self._invert_status(status))
+
+
+class Sentiments:
+    def get_sentiment(self, user_id):
+        return {"neg": 0.1, "pos": 0.6, "neu": 0.3}
+
+
+def run(cls, n):
+    manager = cls(Sentiments(), flush_every=0)
+    manager.set_partner(1, 2, "alice", "bob")
+    emo = dict(zip(EMOTIONS, (10.0, 1.0, 2.0, 60.0, 5.0, 7.0, 15.0)))
+    start = time.perf_counter()
+    for i in range(n):
+        if i % 4:
+            # frame of a paired user
+            manager.log_chat_event(1, individual_emotions=emo, status="sender", message="hello there")
+        else:
+            manager.log_chat_event(2, status="sender", end_sending_time="12:00:01", total_sending_time=1.5,
+                                   complete_message="hello there", message="hello there")
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # single thread, so events/s is per core; each event writes a row for both partners
+    for name, cls in (("row dicts", RowDictLoggerManager), ("compiled schema", LoggerManager)):
+        rate = max(run(cls, args.n) for _ in range(args.repeat))
+        print(f"{name:>16}: {rate:9.0f} events/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import sys
+import pathlib
+# allow: `python benchmarks/bench_logger_memory.py`
+if __package__ in (None, "",):
+    ROOT = pathlib.Path(__file__).resolve().parents[1]
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from app.services.logger import EMOTIONS, Logger
+
+
+class RowDictLogger(Logger):
+    # the previous storage: one full row dict per event in a list
+    def __init__(self):
+        super().__init__()
+        self.frames = []
+
+    def log_event(self, emotion_dict=None, partner_data=None, **kwargs):
+        emotion_dict = emotion_dict or {}
+        partner_data = partner_data or {}
+        self.frames.append({
+            **{col: None for col in self.columns},
+            **kwargs,
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
+            'username': self.username,
+            **{k: emotion_dict.get(k, 0) for k in EMOTIONS},
+            'partner_name': self.partnername,
+            **{f'partner_{k}': v for k, v in partner_data.items()},
+        })
+
+
+def make_events(n):
+    rng = np.random.default_rng(0)
+    events = []
+    for i in range(n):
+        if i % 5:
+            # frame event of a paired user
+            emo = dict(zip(EMOTIONS, (rng.random(len(EMOTIONS)) * 100).tolist()))
+            events.append(dict(emotion_dict=emo, partner_data={"name": "bob", "status": "receiver"},
+                               user_id=1, status="sender", message="hello there"))
+        else:
+            # chat event
+            events.append(dict(emotion_dict={}, partner_data={"name": "bob", "warnings_count": 1},
+                               user_id=1, status="sender", message="hello there", sentiment_neg=0.1,
+                               sentiment_pos=0.7, sentiment_neu=0.2, start_sending_time="12:00:00"))
+    return events
+
+
+def measure(cls, events):
+    gc.collect()
+    tracemalloc.start()
+    logger = cls()
+    logger.username, logger.partnername = "alice", "bob"
+    start = time.perf_counter()
+    for ev in events:
+        logger.log_event(**ev)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return logger, current, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    for n in args.events:
+        events = make_events(n)
+        line = f"events={n:7d}"
+        for name, cls in (("row dicts", RowDictLogger), ("columns", Logger)):
+            _, mem, elapsed = measure(cls, events)
+            line += f"  {name}: {mem / n * 1000 / 1024:8.1f} KiB/1k events {n / elapsed:9.0f} events/s"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
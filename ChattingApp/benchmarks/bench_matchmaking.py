@@ -0,0 +1,83 @@
+import sys
+import pathlib
+# allow: `python benchmarks/bench_matchmaking.py`
+if __package__ in (None, "",):
+    ROOT = pathlib.Path(__file__).resolve().parents[1]
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+
+import argparse
+import random
+import time
+
+from app.services.matchmaking import MatchmakingQueue
+
+
+class ListQueue:
+    # the old RecordingNamespace.waiting: a list rebuilt on every join and disconnect,
+    # plus the linear scan language matching would need on top of it
+    def __init__(self, match_key=None):
+        self.match_key = match_key
+        self.waiting = []
+
+    def match_or_enqueue(self, sid, user_id, username):
+        self.waiting = [w for w in self.waiting if w.get('sid') != sid]
+        key = self.match_key(user_id) if self.match_key else None
+        for i, w in enumerate(self.waiting):
+            if key is None or w['key'] == key:
+                return self.waiting.pop(i)
+        self.waiting.append({'sid': sid, 'user_id': user_id, 'username': username, 'key': key})
+        return None
+
+    def remove(self, sid):
+        self.waiting = [w for w in self.waiting if w.get('sid') != sid]
+
+
+def workload(joins, leave_ratio, seed=0):
+    # a crowd joining at once, with some connections dropping (paired or still waiting) meanwhile
+    rng = random.Random(seed)
+    ops = []
+    for u in range(joins):
+        ops.append(("join", f"sid-{u}", u))
+        if rng.random() < leave_ratio:
+            ops.append(("leave", f"sid-{rng.randrange(u + 1)}", None))
+    return ops
+
+
+def run(queue, ops):
+    start = time.perf_counter()
+    paired = 0
+    for op, sid, user_id in ops:
+        if op == "join":
+            paired += queue.match_or_enqueue(sid, user_id, f"User-{user_id}") is not None
+        else:
+            queue.remove(sid)
+    return time.perf_counter() - start, paired
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Matchmaking queue: list vs indexed ordered dict")
+    ap.add_argument("--joins", default="1000,5000,20000")
+    ap.add_argument("--leave-ratio", type=float, default=0.3)
+    ap.add_argument("--languages", default="100,1000",
+                    help="distinct match keys (chat languages) each joiner picks from at random for the "
+                         "language-matching runs; many keys keep many users waiting")
+    args = ap.parse_args()
+
+    print(f"{'joins':>6} {'keys':>5} {'queue':>8} {'total ms':>10} {'us/op':>9} {'paired':>7} {'waiting':>8}")
+    for joins in (int(j) for j in args.joins.split(",")):
+        ops = workload(joins, args.leave_ratio)
+        for keys in [0] + [int(k) for k in args.languages.split(",")]:
+            langs = random.Random(1)
+            key_of = {u: f"lang-{langs.randrange(keys)}" for u in range(joins)} if keys else None
+            match_key = key_of.get if key_of else None
+            for name, queue in (("list", ListQueue(match_key)),
+                                ("indexed", MatchmakingQueue(match_key, strict=True))):
+                elapsed, paired = run(queue, ops)
+                waiting = len(queue.waiting) if name == "list" else len(queue)
+                print(f"{joins:>6} {keys or '-':>5} {name:>8} {elapsed * 1000:>10.1f} "
+                      f"{elapsed / len(ops) * 1e6:>9.2f} {paired:>7} {waiting:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import sys
+import pathlib
+# allow: `python benchmarks/bench_room_fanout.py`
+if __package__ in (None, "",):
+    ROOT = pathlib.Path(__file__).resolve().parents[1]
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+
+import argparse
+import json
+import time
+
+import socketio
+
+
+NAMESPACE = "/chat"
+
+
+def make_server(pairs):
+    # python-socketio server with 2 * pairs /chat clients; outbound packets are counted, not sent
+    server = socketio.Server(async_mode="threading")
+    sent = [0]
+
+    def send_packet(eio_sid, pkt):
+        sent[0] += 1
+
+    server._send_eio_packet = send_packet
+    rooms = []
+    for p in range(pairs):
+        room = f"pair:{2 * p}_{2 * p + 1}"
+        for u in (2 * p, 2 * p + 1):
+            sid = server.manager.connect(f"eio-{u}", NAMESPACE)
+            server.manager.enter_room(sid, NAMESPACE, room)
+        rooms.append(room)
+    return server, rooms, sent
+
+
+def run(pairs, messages, room_scoped):
+    server, rooms, sent = make_server(pairs)
+    payload = json.dumps({"userID": 0, "message": "hello there", "msgTime": "12:00", "translations": {}})
+    start = time.perf_counter()
+    for i in range(messages):
+        room = rooms[i % pairs] if room_scoped else None
+        server.emit("message", payload, room=room, namespace=NAMESPACE)
+    elapsed = time.perf_counter() - start
+    return {
+        "msgs_per_s": messages / elapsed,
+        "packets_per_msg": sent[0] / messages,
+        "packets_per_s": sent[0] / elapsed,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Chat message fan-out: broadcast vs per-pair rooms")
+    ap.add_argument("--pairs", default="10,50,100,250,500")
+    ap.add_argument("--messages", type=int, default=2000)
+    args = ap.parse_args()
+
+    print(f"{'pairs':>6} {'mode':>10} {'msgs/s':>10} {'pkts/msg':>9} {'pkts/s':>11}")
+    for pairs in (int(p) for p in args.pairs.split(",")):
+        for mode, room_scoped in (("broadcast", False), ("room", True)):
+            r = run(pairs, args.messages, room_scoped)
+            print(f"{pairs:>6} {mode:>10} {r['msgs_per_s']:>10.0f} {r['packets_per_msg']:>9.0f} "
+                  f"{r['packets_per_s']:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
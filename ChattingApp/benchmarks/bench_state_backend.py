@@ -0,0 +1,88 @@
+import sys
+import pathlib
+# allow: `python benchmarks/bench_state_backend.py`
+if __package__ in (None, "",):
+    ROOT = pathlib.Path(__file__).resolve().parents[1]
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+
+import argparse
+import multiprocessing as mp
+import os
+import tempfile
+import time
+
+from app.services.state_backend import create_state_backend
+
+
+def map_ops(backend, n):
+    # what handlers do per event: session lookup per frame, partner lookup per chat event
+    sessions = backend.map("recording_sessions")
+    partners = backend.map("partners")
+    for u in range(n):
+        sessions[u] = {"sid": f"sid-{u}"}
+        partners[u] = u ^ 1
+    start = time.perf_counter()
+    for u in range(n):
+        sessions.get(u)
+        partners.get(u)
+    return (time.perf_counter() - start) / (2 * n)
+
+
+def join_worker(path, worker, joins, out):
+    # one server process: its users start recording while the other processes do the same
+    backend = create_state_backend("sqlite", path)
+    queue = backend.matchmaking()
+    pairs = []
+    start = time.perf_counter()
+    for i in range(joins):
+        user_id = worker * joins + i
+        partner = queue.match_or_enqueue(f"sid-{user_id}", user_id, f"User-{user_id}")
+        if partner:
+            pairs.append((user_id, partner["user_id"]))
+    out.put((time.perf_counter() - start, pairs))
+    backend.close()
+
+
+def run_processes(workers, joins):
+    path = os.path.join(tempfile.mkdtemp(), "state.sqlite3")
+    create_state_backend("sqlite", path).close()
+    out = mp.Queue()
+    procs = [mp.Process(target=join_worker, args=(path, w, joins, out)) for w in range(workers)]
+    start = time.perf_counter()
+    for p in procs:
+        p.start()
+    results = [out.get() for _ in procs]
+    for p in procs:
+        p.join()
+    wall = time.perf_counter() - start
+    pairs = [pair for _, worker_pairs in results for pair in worker_pairs]
+    paired = [u for pair in pairs for u in pair]
+    waiting = len(create_state_backend("sqlite", path).matchmaking())
+    # every user is in at most one pair, and everyone is either paired or still waiting
+    assert len(paired) == len(set(paired)), "a user was paired twice"
+    assert len(paired) + waiting == workers * joins, "a user was lost"
+    return wall, len(pairs), waiting
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Shared state backends: map lookups and multi-process matchmaking")
+    ap.add_argument("--lookups", type=int, default=20000)
+    ap.add_argument("--workers", default="1,2,4")
+    ap.add_argument("--joins", type=int, default=2000, help="start_recording calls per worker process")
+    args = ap.parse_args()
+
+    for kind in ("memory", "sqlite"):
+        backend = create_state_backend(kind, os.path.join(tempfile.mkdtemp(), "state.sqlite3"))
+        print(f"{kind:>7} map lookup: {map_ops(backend, args.lookups) * 1e6:.2f} us")
+        backend.close()
+
+    print(f"\n{'workers':>7} {'joins':>7} {'wall ms':>9} {'joins/s':>9} {'pairs':>6} {'waiting':>8}")
+    for workers in (int(w) for w in args.workers.split(",")):
+        wall, pairs, waiting = run_processes(workers, args.joins)
+        total = workers * args.joins
+        print(f"{workers:>7} {total:>7} {wall * 1000:>9.0f} {total / wall:>9.0f} {pairs:>6} {waiting:>8}")
+
+
+if __name__ == "__main__":
+    main()
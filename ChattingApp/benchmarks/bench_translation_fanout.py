@@ -0,0 +1,85 @@
+import sys
+import pathlib
+# allow: `python benchmarks/bench_translation_fanout.py`
+if __package__ in (None, "",):
+    ROOT = pathlib.Path(__file__).resolve().parents[1]
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+
+import argparse
+import time
+
+from app.utils.translation_backends import PhraseTableBackend
+from app.utils.translator_service import TranslatorService
+
+LANGS = ("en", "es", "fr", "ar")
+
+
+class SlowBackend(PhraseTableBackend):
+    # deterministic stand-in for the online provider: phrase tables behind a fixed per-language delay
+    name = "slow-local"
+    remote = True
+
+    def __init__(self, delays_s, directory):
+        super().__init__(tables={lang: {"hello": f"hello-{lang}"} for lang in delays_s}, directory=directory)
+        self.delays_s = delays_s
+
+    def create(self, lang):
+        table = super().create(lang)
+        delay = self.delays_s[lang]
+
+        class Slow:
+            def translate(self, text):
+                time.sleep(delay)
+                return table.translate(text)
+        return Slow()
+
+
+def make_service(backend, deadline_s):
+    ts = TranslatorService(backend=backend, deadline_s=deadline_s, breaker_failures=10 ** 6)
+    for user_id, lang in enumerate(LANGS):
+        ts.set_language(user_id, lang)
+    ts._ensure_translator("en")
+    return ts
+
+
+def run(ts, messages, serial):
+    start = time.perf_counter()
+    for i in range(messages):
+        text = f"hello there, message {i}"  # distinct texts: every language misses the cache
+        if serial:
+            # the old build_translations_map: one blocking call per language
+            {lang: ts._translate_cached(lang, text) for lang in ts._active_languages_snapshot() | {"en"}}
+        else:
+            ts.build_translations_map(text)
+    return (time.perf_counter() - start) / messages
+
+
+def main():
+    ap = argparse.ArgumentParser(description="build_translations_map: serial vs concurrent with a deadline")
+    ap.add_argument("--messages", type=int, default=20)
+    ap.add_argument("--delay-ms", type=float, default=80.0, help="remote latency of every language")
+    ap.add_argument("--stuck-ms", type=float, default=1500.0, help="latency of one language that hangs")
+    ap.add_argument("--deadline-ms", type=float, default=300.0)
+    ap.add_argument("--phrase-tables", default="app/assets/phrase_tables")
+    args = ap.parse_args()
+
+    deadline = args.deadline_ms / 1000.0
+    delays = {lang: args.delay_ms / 1000.0 for lang in LANGS}
+    stuck = dict(delays, ar=args.stuck_ms / 1000.0)
+    cases = (
+        ("remote, serial", SlowBackend(delays, args.phrase_tables), True),
+        ("remote, concurrent", SlowBackend(delays, args.phrase_tables), False),
+        ("remote + 1 stuck, serial", SlowBackend(stuck, args.phrase_tables), True),
+        ("remote + 1 stuck, concurrent", SlowBackend(stuck, args.phrase_tables), False),
+        ("local phrase tables", PhraseTableBackend(directory=args.phrase_tables), False),
+    )
+    print(f"{'backend':>30} {'ms/message':>11}")
+    for name, backend, serial in cases:
+        ts = make_service(backend, deadline)
+        messages = args.messages if backend.remote else args.messages * 100
+        print(f"{name:>30} {run(ts, messages, serial) * 1000:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
-from app.app import app, socketio
 import os
 
 if __name__ == "__main__":
+    # imported here so frame worker processes (spawned) do not load the whole app again
+    from app.app import app, socketio
     host = "0.0.0.0"
     port = int(os.environ.get("PORT", 5001))
-    # eventlet/gevent automatically used if installed
-    socketio.run(app, host=host, port=port, debug=False)
\ No newline at end of file
+    # async_mode is pinned to "threading" (Config.SOCKETIO_ASYNC_MODE), so even with gevent
+    # installed this is Werkzeug's threaded server with simple-websocket
+    socketio.run(app, host=host, port=port, debug=False,
+                 allow_unsafe_werkzeug=socketio.async_mode == "threading")
\ No newline at end of file
@@ -0,0 +1,7 @@
+import sys
+import pathlib
+
+# allow: `python -m pytest` from ChattingApp/ or from the repository root
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
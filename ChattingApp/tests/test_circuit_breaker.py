@@ -0,0 +1,65 @@
+from app.services.circuit_breaker import CircuitBreaker
+
+
+def test_stays_closed_below_the_failure_threshold():
+    breaker = CircuitBreaker(failures=3, cooldown_s=10)
+    breaker.failure(now=0)
+    breaker.failure(now=1)
+    assert breaker.state == "closed"
+    assert breaker.allow(now=2)
+    breaker.success()
+    breaker.failure(now=3)
+    breaker.failure(now=4)
+    # success reset the count
+    assert breaker.state == "closed"
+
+
+def test_opens_after_consecutive_failures_and_rejects_during_cooldown():
+    breaker = CircuitBreaker(failures=2, cooldown_s=10)
+    breaker.failure(now=0)
+    breaker.failure(now=1)
+    assert breaker.state == "open"
+    assert not breaker.allow(now=5)
+    assert not breaker.allow(now=10.9)
+    assert breaker.stats()["rejected"] == 2
+    assert breaker.stats()["opened"] == 1
+
+
+def test_half_open_lets_one_trial_through():
+    breaker = CircuitBreaker(failures=1, cooldown_s=10)
+    breaker.failure(now=0)
+    assert breaker.allow(now=10)
+    assert breaker.state == "half_open"
+    assert not breaker.allow(now=11)
+
+
+def test_successful_trial_closes():
+    breaker = CircuitBreaker(failures=1, cooldown_s=10)
+    breaker.failure(now=0)
+    assert breaker.allow(now=10)
+    breaker.success()
+    assert breaker.state == "closed"
+    assert breaker.allow(now=11)
+
+
+def test_failed_trial_reopens_for_another_cooldown():
+    breaker = CircuitBreaker(failures=3, cooldown_s=10)
+    for t in range(3):
+        breaker.failure(now=t)
+    assert breaker.allow(now=12)
+    breaker.failure(now=13)
+    assert breaker.state == "open"
+    assert not breaker.allow(now=22)
+    assert breaker.allow(now=23)
+    assert breaker.stats()["opened"] == 2
+
+
+def test_hung_trial_is_replaced_after_a_cooldown():
+    breaker = CircuitBreaker(failures=1, cooldown_s=10)
+    breaker.failure(now=0)
+    assert breaker.allow(now=10)  # trial call that never returns
+    assert not breaker.allow(now=19)
+    assert breaker.allow(now=20)
+    assert not breaker.allow(now=21)
+    breaker.success()
+    assert breaker.state == "closed"
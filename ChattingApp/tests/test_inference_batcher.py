@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+
+from app.services.inference_batcher import InferenceBatcher
+
+
+class RecordingModel:
+    # doubles its inputs and remembers the batches it was given
+    def __init__(self, gate: threading.Event | None = None):
+        self.batches = []
+        self.gate = gate
+
+    def predict_batch(self, items):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.batches.append(list(items))
+        return [item * 2 for item in items]
+
+
+class ShortModel:
+    def predict_batch(self, items):
+        return [0] * (len(items) - 1)
+
+
+class FailingModel:
+    def predict_batch(self, items):
+        raise ValueError("model exploded")
+
+
+@pytest.fixture
+def batchers():
+    made = []
+
+    def make(*args, **kwargs):
+        batcher = InferenceBatcher(*args, **kwargs)
+        made.append(batcher)
+        return batcher
+
+    yield make
+    for batcher in made:
+        batcher.close(timeout=1)
+
+
+def test_predict_returns_each_items_own_result(batchers):
+    batcher = batchers(RecordingModel(), max_batch_size=4, batch_window_ms=1)
+    assert batcher.predict(3) == 6
+    assert batcher.predict(5) == 10
+
+
+def test_full_batch_closes_before_the_window(batchers):
+    model = RecordingModel()
+    batcher = batchers(model, max_batch_size=3, batch_window_ms=10_000)
+    start = time.perf_counter()
+    futures = [batcher.submit(i) for i in range(3)]
+    assert [f.result(timeout=5) for f in futures] == [0, 2, 4]
+    # nowhere near the 10 s window
+    assert time.perf_counter() - start < 5
+    assert model.batches == [[0, 1, 2]]
+    assert batcher.stats()["batch_size_histogram"] == {3: 1}
+
+
+def test_window_closes_a_partial_batch(batchers):
+    model = RecordingModel()
+    batcher = batchers(model, max_batch_size=32, batch_window_ms=50)
+    start = time.perf_counter()
+    futures = [batcher.submit(i) for i in range(2)]
+    assert [f.result(timeout=5) for f in futures] == [0, 2]
+    assert time.perf_counter() - start >= 0.04
+    assert model.batches == [[0, 1]]
+
+
+def test_batches_are_capped_at_max_batch_size(batchers):
+    gate = threading.Event()
+    model = RecordingModel(gate)
+    batcher = batchers(model, max_batch_size=2, batch_window_ms=1)
+    futures = [batcher.submit(i) for i in range(5)]
+    gate.set()
+    assert [f.result(timeout=5) for f in futures] == [0, 2, 4, 6, 8]
+    assert all(len(b) <= 2 for b in model.batches)
+    assert sum(len(b) for b in model.batches) == 5
+
+
+def test_model_exception_reaches_every_caller(batchers):
+    batcher = batchers(FailingModel(), max_batch_size=4, batch_window_ms=20)
+    futures = [batcher.submit(i) for i in range(3)]
+    for f in futures:
+        with pytest.raises(ValueError, match="model exploded"):
+            f.result(timeout=5)
+    # the worker survives the failure
+    batcher.model = RecordingModel()
+    assert batcher.predict(1) == 2
+
+
+def test_short_result_list_fails_the_batch_instead_of_hanging(batchers):
+    batcher = batchers(ShortModel(), max_batch_size=4, batch_window_ms=20)
+    futures = [batcher.submit(i) for i in range(3)]
+    for f in futures:
+        with pytest.raises(RuntimeError, match="2 results for 3 inputs"):
+            f.result(timeout=5)
+
+
+def test_submit_after_close_raises(batchers):
+    batcher = batchers(RecordingModel(), max_batch_size=4, batch_window_ms=1)
+    batcher.close(timeout=1)
+    with pytest.raises(RuntimeError):
+        batcher.submit(1)
@@ -0,0 +1,55 @@
+import threading
+
+import pytest
+
+from app.services.logger import Logger
+from app.services.persistence_queue import PersistenceQueue
+
+
+@pytest.fixture(autouse=True)
+def in_tmp(tmp_path, monkeypatch):
+    # session logs and exports go under ./data
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _log(logger, n):
+    for _ in range(n):
+        logger.log_event(emotion_dict={"happy": 1.0}, status="sender", message="hi")
+
+
+def test_full_queue_defers_the_write_instead_of_blocking():
+    q = PersistenceQueue(max_pending=1)
+    gate = threading.Event()
+    q.submit(gate.wait)         # the worker is busy
+    q.submit(lambda: None)      # and the queue is full
+    logger = Logger(flush_every=5, persistence=q)
+    _log(logger, 12)            # would block forever on a blocking submit
+    assert logger.deferred_writes == 2
+    assert len(logger) == 12
+    gate.set()
+    q.close()
+
+
+def test_closed_queue_falls_back_to_an_inline_write():
+    q = PersistenceQueue()
+    q.close()
+    logger = Logger(flush_every=5, persistence=q)
+    _log(logger, 7)
+    assert logger._flushed == 5
+    assert not logger._write_scheduled
+    assert len(logger) == 7
+
+
+def test_export_includes_deferred_buffers_and_removes_the_parts(in_tmp):
+    q = PersistenceQueue()
+    logger = Logger(flush_every=4, persistence=q)
+    logger.username = "alice"
+    _log(logger, 10)
+    path = logger.save_to_excel()
+    q.close()
+    from openpyxl import load_workbook
+
+    assert load_workbook(path).active.max_row == 11  # header + 10 events
+    assert list((in_tmp / "data" / "sessions").iterdir()) == []
+    assert len(logger) == 0
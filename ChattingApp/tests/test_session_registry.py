@@ -0,0 +1,130 @@
+import pytest
+
+from app.services.session_registry import SessionRegistry
+
+
+class Component:
+    def __init__(self, log, name="c"):
+        self.log = log
+        self.name = name
+        self.users = set()
+
+    def release(self, user_id):
+        self.log.append(("release", self.name, user_id))
+        self.users.discard(user_id)
+
+    def before_evict(self, user_id):
+        self.log.append(("before_evict", self.name, user_id))
+
+    def counts(self):
+        return {"users": len(self.users)}
+
+
+@pytest.fixture
+def log():
+    return []
+
+
+def _registry(log, **kwargs):
+    kwargs.setdefault("ttl_s", 1800)
+    kwargs.setdefault("disconnect_ttl_s", 120)
+    registry = SessionRegistry(**kwargs)
+    first, second = Component(log, "first"), Component(log, "second")
+    registry.register("first", first.release, before_evict=first.before_evict, counts=first.counts)
+    registry.register("second", second.release)
+    return registry
+
+
+def test_evict_runs_every_before_evict_hook_before_any_release(log):
+    registry = _registry(log)
+    registry.touch(1)
+    assert registry.evict(1)
+    assert log == [("before_evict", "first", 1), ("release", "first", 1), ("release", "second", 1)]
+    assert not registry.evict(1)
+    assert registry.stats()["evictions"] == {"manual": 1}
+
+
+def test_a_failing_hook_does_not_stop_the_others(log):
+    registry = _registry(log)
+
+    def broken(user_id):
+        raise RuntimeError("boom")
+
+    registry.register("broken", broken)
+    registry.touch(1)
+    assert registry.evict(1)
+    assert ("release", "second", 1) in log
+
+
+def test_sweep_evicts_idle_users(log, monkeypatch):
+    registry = _registry(log, ttl_s=100)
+    now = [1000.0]
+    monkeypatch.setattr("app.services.session_registry.time.monotonic", lambda: now[0])
+    registry.touch(1)
+    now[0] += 50
+    registry.touch(2)
+    assert registry.sweep(now=now[0] + 60) == [1]
+    assert registry.stats()["evictions"] == {"idle": 1}
+
+
+def test_sweep_evicts_disconnected_users_after_the_disconnect_ttl(log, monkeypatch):
+    registry = _registry(log)
+    now = [1000.0]
+    monkeypatch.setattr("app.services.session_registry.time.monotonic", lambda: now[0])
+    registry.connected(1, "sid-1")
+    now[0] += 1
+    registry.disconnected("sid-1")
+    assert registry.sweep(now=now[0] + 119) == []
+    assert registry.sweep(now=now[0] + 121) == [1]
+    assert registry.stats()["evictions"] == {"disconnected": 1}
+
+
+def test_activity_after_the_disconnect_keeps_the_user(log, monkeypatch):
+    registry = _registry(log)
+    now = [1000.0]
+    monkeypatch.setattr("app.services.session_registry.time.monotonic", lambda: now[0])
+    registry.connected(1, "sid-1")
+    now[0] += 1
+    registry.disconnected("sid-1")
+    now[0] += 1
+    registry.touch(1)  # still chatting on /chat
+    assert registry.sweep(now=now[0] + 121) == []
+    # ...until they go idle
+    assert registry.sweep(now=now[0] + 1800) == [1]
+    assert registry.stats()["evictions"] == {"idle": 1}
+
+
+def test_reconnect_clears_the_disconnect(log, monkeypatch):
+    registry = _registry(log)
+    now = [1000.0]
+    monkeypatch.setattr("app.services.session_registry.time.monotonic", lambda: now[0])
+    registry.connected(1, "sid-1")
+    registry.disconnected("sid-1")
+    now[0] += 5
+    registry.connected(1, "sid-2")
+    assert registry.stats()["disconnected"] == 0
+    assert registry.sweep(now=now[0] + 121) == []
+
+
+def test_user_cap_evicts_least_recently_active_first(log, monkeypatch):
+    registry = _registry(log, max_users=2)
+    now = [1000.0]
+    monkeypatch.setattr("app.services.session_registry.time.monotonic", lambda: now[0])
+    for user_id in (1, 2, 3):
+        now[0] += 1
+        registry.touch(user_id)
+    now[0] += 1
+    registry.touch(1)
+    assert registry.sweep(now=now[0]) == [2]
+    assert registry.stats()["evictions"] == {"user_cap": 1}
+
+
+def test_memory_cap_evicts_until_under_the_cap(log):
+    registry = _registry(log, max_memory_mb=1)
+    sizes = {1: 600_000, 2: 600_000, 3: 100_000}
+    registry.register("memory", lambda u: sizes.pop(u, None), memory=lambda: sum(sizes.values()))
+    for user_id in sizes:
+        registry.touch(user_id)
+    assert registry.sweep() == [1]
+    assert registry.stats()["evictions"] == {"memory_cap": 1}
+    assert registry.stats()["objects"]["first"] == {"users": 0}
@@ -0,0 +1,177 @@
+import time
+
+import pytest
+
+from app.services.state_backend import SqliteStateBackend
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "state.sqlite3")
+
+
+@pytest.fixture
+def backend(db_path):
+    b = SqliteStateBackend(db_path)
+    yield b
+    b.close()
+
+
+def _add_owner(backend, owner, host, pid, seen_at=None):
+    backend.connection().execute("INSERT INTO owners (owner, host, pid, seen_at) VALUES (?, ?, ?, ?)",
+                                 (owner, host, pid, time.time() if seen_at is None else seen_at))
+
+
+def test_map_roundtrip_keeps_json_types(backend):
+    m = backend.map("sessions")
+    m[1] = {"sid": "abc"}
+    m["1"] = [1, 2]
+    assert m[1] == {"sid": "abc"}
+    assert m["1"] == [1, 2]
+    assert sorted(m, key=repr) == ["1", 1]
+    assert len(m) == 2
+    assert m.get(2) is None
+    assert 1 in m and 2 not in m
+
+
+def test_map_pop_and_delete(backend):
+    m = backend.map("partners")
+    m[1] = 2
+    assert m.pop(1) == 2
+    assert m.pop(1, None) is None
+    with pytest.raises(KeyError):
+        m.pop(1)
+    m[3] = 4
+    del m[3]
+    with pytest.raises(KeyError):
+        del m[3]
+
+
+def test_maps_with_different_names_are_separate(backend):
+    a, b = backend.map("a"), backend.map("b")
+    a[1] = "x"
+    assert 1 not in b
+    assert b.values() == []
+    assert a.values() == ["x"]
+
+
+def test_set_add_discard(backend):
+    s = backend.set("sending_active")
+    s.add(7)
+    s.add(7)
+    assert 7 in s and len(s) == 1
+    s.discard(7)
+    s.discard(7)
+    assert 7 not in s and list(s) == []
+
+
+def test_matchmaking_pairs_oldest_waiter(backend):
+    q = backend.matchmaking()
+    assert q.match_or_enqueue("sid-1", 1, "alice") is None
+    assert len(q) == 1
+    assert q.match_or_enqueue("sid-2", 2, "bob")["sid"] == "sid-1"
+    assert len(q) == 0
+    assert q.match_or_enqueue("sid-3", 3, "carol") is None
+    assert q.remove("sid-3")
+    assert not q.remove("sid-3")
+    assert len(q) == 0
+
+
+def test_matchmaking_rejoin_does_not_pair_with_itself(backend):
+    q = backend.matchmaking()
+    assert q.match_or_enqueue("sid-1", 1, "alice") is None
+    assert q.match_or_enqueue("sid-1", 1, "alice") is None
+    assert len(q) == 1
+    partner = q.match_or_enqueue("sid-2", 2, "bob")
+    assert partner == {"sid": "sid-1", "user_id": 1, "username": "alice", "key": None}
+
+
+def test_matchmaking_strict_language_keys(backend):
+    langs = {1: "fr", 2: "es", 3: "fr", 4: None}
+    q = backend.matchmaking(langs.get, strict=True)
+    assert q.match_or_enqueue("sid-1", 1, "a") is None
+    assert q.match_or_enqueue("sid-2", 2, "b") is None
+    assert q.match_or_enqueue("sid-3", 3, "c")["sid"] == "sid-1"
+    # unknown key: pairs with anyone
+    assert q.match_or_enqueue("sid-4", 4, "d")["sid"] == "sid-2"
+    stats = q.stats()
+    assert stats["matched"] == 2 and stats["matched_on_key"] == 1
+
+
+def test_reopen_drops_rows_of_a_closed_process(db_path):
+    b = SqliteStateBackend(db_path)
+    b.matchmaking().match_or_enqueue("dead-sid", 1, "alice")
+    b.map("recording_sessions")[1] = {"sid": "dead-sid"}
+    b.map("partners")[1] = 2
+    b.close()
+
+    b = SqliteStateBackend(db_path)
+    try:
+        assert b.matchmaking().match_or_enqueue("sid-2", 2, "bob") is None
+        assert len(b.map("recording_sessions")) == 0
+        assert len(b.map("partners")) == 0
+    finally:
+        b.close()
+
+
+def test_reopen_after_crash_drops_its_rows(db_path):
+    b = SqliteStateBackend(db_path)
+    b.matchmaking().match_or_enqueue("dead-sid", 1, "alice")
+    b.map("partners")[1] = 2
+    # no close(): the process died; a new one (same pid, new boot token) takes over
+    b._stop.set()
+
+    fresh = SqliteStateBackend(db_path)
+    try:
+        assert fresh.matchmaking().match_or_enqueue("sid-2", 2, "bob") is None
+        assert 1 not in fresh.map("partners")
+    finally:
+        fresh.close()
+
+
+def test_purge_keeps_rows_of_live_owners(backend):
+    _add_owner(backend, "elsewhere:42:abcd", "elsewhere", 42)
+    backend.connection().execute("INSERT INTO kv (name, key, value, owner) VALUES ('partners', '5', '6', ?)",
+                                 ("elsewhere:42:abcd",))
+    backend.map("partners")[1] = 2
+    assert backend.purge_stale() == 0
+    assert backend.map("partners")[5] == 6
+    assert backend.map("partners")[1] == 2
+
+
+def test_purge_drops_rows_of_owners_past_the_ttl(backend):
+    owner = "elsewhere:42:abcd"
+    _add_owner(backend, owner, "elsewhere", 42, seen_at=time.time() - backend.owner_ttl_s - 1)
+    conn = backend.connection()
+    conn.execute("INSERT INTO kv (name, key, value, owner) VALUES ('partners', '5', '6', ?)", (owner,))
+    conn.execute("INSERT INTO waiting (sid, user_id, username, key, owner) VALUES ('old', 5, 'x', NULL, ?)",
+                 (owner,))
+    assert backend.purge_stale() == 2
+    assert 5 not in backend.map("partners")
+    assert len(backend.matchmaking()) == 0
+    assert conn.execute("SELECT COUNT(*) FROM owners WHERE owner = ?", (owner,)).fetchone()[0] == 0
+
+
+def test_startup_with_a_live_peer_keeps_its_rows(db_path):
+    b = SqliteStateBackend(db_path)
+    peer = "elsewhere:42:abcd"
+    _add_owner(b, peer, "elsewhere", 42)
+    b.connection().execute("INSERT INTO kv (name, key, value, owner) VALUES ('partners', '5', '6', ?)", (peer,))
+    b.map("partners")[1] = 2
+    b._stop.set()  # crashes
+
+    fresh = SqliteStateBackend(db_path)
+    try:
+        assert fresh.map("partners")[5] == 6
+        assert 1 not in fresh.map("partners")
+    finally:
+        fresh.close()
+
+
+def test_rows_are_stamped_with_the_writer(backend):
+    backend.map("user_names")[1] = "alice"
+    backend.matchmaking().match_or_enqueue("sid-1", 1, "alice")
+    conn = backend.connection()
+    assert conn.execute("SELECT owner FROM kv").fetchone()[0] == backend.owner()
+    assert conn.execute("SELECT owner FROM waiting").fetchone()[0] == backend.owner()
+    assert backend.stats()["owners"] == 1
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from app.services.translation_cache import TranslationCache
+from app.utils.translation_backends import (
+    OnlineTranslationBackend, PhraseTable, PhraseTableBackend, TranslationBackend, create_translation_backend,
+)
+from app.utils.translator_service import TranslatorService
+
+
+def test_longest_phrase_wins():
+    table = PhraseTable({"good": "bon", "good evening": "bonsoir", "evening": "soir"})
+    assert table.translate("good evening") == "bonsoir"
+    assert table.translate("good morning") == "bon morning"
+    assert table.translate("evening good") == "soir bon"
+
+
+def test_matching_ignores_case_and_keeps_a_leading_capital():
+    table = PhraseTable({"Thank You": "merci", "hello": "bonjour"})
+    assert table.translate("THANK you") == "Merci"
+    assert table.translate("hello") == "bonjour"
+    assert table.translate("Hello") == "Bonjour"
+
+
+def test_unknown_words_and_punctuation_pass_through():
+    table = PhraseTable({"hello": "bonjour", "how are you": "comment ça va"})
+    assert table.translate("Hello, Bob! How are you?") == "Bonjour, Bob! Comment ça va?"
+    assert table.translate("nothing to see") == "nothing to see"
+    assert table.translate("") == ""
+
+
+def test_phrase_keys_are_normalised():
+    table = PhraseTable({"  how   are you? ": "comment ça va", "": "ignored"})
+    assert table.translate("how are you") == "comment ça va"
+    assert table.max_words == 3
+
+
+def test_backend_loads_tables_from_directory_and_overrides(tmp_path):
+    (tmp_path / "fr.json").write_text(json.dumps({"hello": "bonjour", "yes": "oui"}), encoding="utf-8")
+    backend = PhraseTableBackend({"fr": {"yes": "ouais"}}, directory=str(tmp_path))
+    tr = backend.create("fr")
+    assert tr.translate("hello yes") == "bonjour ouais"
+    assert backend.create("de") is None
+    assert not backend.remote
+
+
+def test_create_translation_backend_kinds(tmp_path):
+    local = create_translation_backend("local", str(tmp_path))
+    assert isinstance(local, PhraseTableBackend) and local.directory == str(tmp_path)
+    assert isinstance(create_translation_backend("online"), OnlineTranslationBackend)
+    default = create_translation_backend(None, str(tmp_path))
+    expected = OnlineTranslationBackend if OnlineTranslationBackend.available() else PhraseTableBackend
+    assert isinstance(default, expected)
+    with pytest.raises(ValueError):
+        create_translation_backend("carrier-pigeon")
+
+
+class EchoRemoteBackend(TranslationBackend):
+    name = "echo-remote"
+    remote = True
+
+    def create(self, lang):
+        class Echo:
+            def translate(self, text):
+                return f"[{lang}] {text}"
+
+        return Echo()
+
+
+def test_each_language_uses_its_own_backend():
+    local = PhraseTableBackend({"en": {"bonjour": "hello"}})
+    cache = TranslationCache(ttl_s=None)
+    service = TranslatorService(cache=cache, backend=EchoRemoteBackend(), backends={"en": local})
+    try:
+        service.set_language(1, "fr")
+        assert service.translate_to("en", "bonjour") == "hello"
+        assert service.translate_to("fr", "hello") == "[fr] hello"
+        # only the remote backend's results are cached
+        assert cache.get("en", "bonjour") is None
+        assert cache.get("fr", "hello") == "[fr] hello"
+        languages = service.stats()["languages"]
+        assert languages["en"]["backend"] == "local"
+        assert languages["fr"]["backend"] == "echo-remote"
+    finally:
+        service.close()
+
+
+def test_default_backend_reads_the_configured_phrase_tables(monkeypatch, tmp_path):
+    from app.config.config import Config
+
+    (tmp_path / "es.json").write_text(json.dumps({"hello": "hola"}), encoding="utf-8")
+    monkeypatch.setattr(Config, "PHRASE_TABLE_DIR", str(tmp_path))
+    monkeypatch.setattr(OnlineTranslationBackend, "available", staticmethod(lambda: False))
+    service = TranslatorService(cache=TranslationCache(ttl_s=None))
+    try:
+        service.set_language(1, "es")
+        assert service.translate_to("es", "hello there") == "hola there"
+    finally:
+        service.close()
@@ -0,0 +1,231 @@
+import sqlite3
+import time
+
+import pytest
+
+from app.services.translation_cache import TranslationCache
+from app.utils.translation_backends import CheckedTranslator, TranslationBackend
+from app.utils.translator_service import TranslatorService
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(time, "time", clock)
+    return clock
+
+
+def test_lru_evicts_least_recently_used():
+    cache = TranslationCache(capacity=2, ttl_s=None)
+    cache.put("fr", "a", "A")
+    cache.put("fr", "b", "B")
+    assert cache.get("fr", "a") == "A"  # "b" is now the oldest
+    cache.put("fr", "c", "C")
+    assert cache.get("fr", "b") is None
+    assert cache.get("fr", "a") == "A"
+    assert cache.get("fr", "c") == "C"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_key_includes_the_language():
+    cache = TranslationCache(ttl_s=None)
+    cache.put("fr", "hello", "bonjour")
+    assert cache.get("es", "hello") is None
+    assert cache.get("fr", "hello") == "bonjour"
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = TranslationCache(ttl_s=60)
+    cache.put("fr", "hello", "bonjour")
+    clock.now += 59
+    assert cache.get("fr", "hello") == "bonjour"
+    clock.now += 2
+    assert cache.get("fr", "hello") is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1 and stats["size"] == 0
+
+
+def test_misses_fall_back_to_disk(tmp_path):
+    path = str(tmp_path / "translations.sqlite3")
+    cache = TranslationCache(ttl_s=None, path=path)
+    cache.put("fr", "hello", "bonjour")
+    cache.close()
+
+    warm = TranslationCache(ttl_s=None, path=path)
+    try:
+        assert warm.get("fr", "hello") == "bonjour"
+        assert warm.get("fr", "hello") == "bonjour"
+        stats = warm.stats()
+        assert stats["disk_hits"] == 1 and stats["hits"] == 1 and stats["stored"] == 1
+    finally:
+        warm.close()
+
+
+def test_memory_eviction_keeps_disk_copy(tmp_path):
+    cache = TranslationCache(capacity=1, ttl_s=None, path=str(tmp_path / "t.sqlite3"))
+    try:
+        cache.put("fr", "a", "A")
+        cache.put("fr", "b", "B")
+        assert cache.get("fr", "a") == "A"
+        assert cache.stats()["disk_hits"] == 1
+    finally:
+        cache.close()
+
+
+def test_expired_rows_are_pruned_on_open(tmp_path, clock):
+    path = str(tmp_path / "translations.sqlite3")
+    cache = TranslationCache(ttl_s=60, path=path)
+    cache.put("fr", "old", "vieux")
+    clock.now += 30
+    cache.put("fr", "new", "nouveau")
+    cache.close()
+
+    clock.now += 45  # "old" expired, "new" has 15 s left
+    reopened = TranslationCache(ttl_s=60, path=path)
+    try:
+        assert reopened.stats()["stored"] == 1
+        assert reopened.get("fr", "old") is None
+        assert reopened.get("fr", "new") == "nouveau"
+    finally:
+        reopened.close()
+
+
+def test_disk_is_trimmed_to_capacity_every_prune_every_writes(tmp_path, clock):
+    cache = TranslationCache(ttl_s=3600, path=str(tmp_path / "t.sqlite3"), disk_capacity=3, prune_every=5)
+    try:
+        for i in range(5):
+            clock.now += 1
+            cache.put("fr", f"t{i}", f"T{i}")
+        # the oldest writes go first
+        rows = cache._db.execute("SELECT text FROM translations ORDER BY text").fetchall()
+        assert [r[0] for r in rows] == ["t2", "t3", "t4"]
+    finally:
+        cache.close()
+
+
+def test_disk_trim_without_ttl_drops_the_oldest_writes(tmp_path, clock):
+    cache = TranslationCache(ttl_s=None, path=str(tmp_path / "t.sqlite3"), disk_capacity=3, prune_every=5)
+    try:
+        for i in (3, 1, 4, 0, 2):
+            clock.now += 1
+            cache.put("fr", f"t{i}", f"T{i}")
+        rows = cache._db.execute("SELECT text FROM translations ORDER BY text").fetchall()
+        assert [r[0] for r in rows] == ["t0", "t2", "t4"]
+    finally:
+        cache.close()
+
+
+def test_files_without_written_at_are_migrated(tmp_path):
+    path = str(tmp_path / "t.sqlite3")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE translations (lang TEXT, text TEXT, translation TEXT,"
+               " expires_at REAL, PRIMARY KEY (lang, text)) WITHOUT ROWID")
+    db.execute("INSERT INTO translations VALUES ('fr', 'hello', 'bonjour', NULL)")
+    db.commit()
+    db.close()
+    cache = TranslationCache(ttl_s=None, path=path)
+    try:
+        assert cache.get("fr", "hello") == "bonjour"
+        cache.put("fr", "bye", "au revoir")
+        assert cache.stats()["stored"] == 2
+    finally:
+        cache.close()
+
+
+def test_unpersisted_puts_stay_in_memory(tmp_path):
+    path = str(tmp_path / "t.sqlite3")
+    cache = TranslationCache(ttl_s=None, path=path)
+    cache.put("fr", "hel", "hel", persist=False)
+    assert cache.get("fr", "hel") == "hel"
+    assert cache.stats()["stored"] == 0
+    cache.close()
+    reopened = TranslationCache(ttl_s=None, path=path)
+    try:
+        assert reopened.get("fr", "hel") is None
+    finally:
+        reopened.close()
+
+
+def test_clear_empties_memory_and_disk(tmp_path):
+    cache = TranslationCache(ttl_s=None, path=str(tmp_path / "t.sqlite3"))
+    try:
+        cache.put("fr", "hello", "bonjour")
+        cache.clear()
+        assert cache.get("fr", "hello") is None
+        assert cache.stats()["stored"] == 0
+    finally:
+        cache.close()
+
+
+class QuotaProvider:
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = 0
+
+    def translate(self, text):
+        self.calls += 1
+        return self.answer
+
+
+class FakeRemoteBackend(TranslationBackend):
+    name = "fake-remote"
+    remote = True
+
+    def __init__(self, provider):
+        self.provider = provider
+
+    def create(self, lang):
+        return CheckedTranslator(self.provider)
+
+
+@pytest.mark.parametrize("answer", [
+    "MYMEMORY WARNING: YOU USED ALL AVAILABLE FREE TRANSLATIONS FOR TODAY. NEXT AVAILABLE IN 10 HOURS",
+    "QUERY LENGTH LIMIT EXCEEDED. MAX ALLOWED QUERY : 500 CHARS",
+    "'XX' IS AN INVALID TARGET LANGUAGE . EXAMPLE: LANGPAIR=EN|IT",
+])
+def test_provider_warnings_are_failures_and_not_cached(answer):
+    provider = QuotaProvider(answer)
+    cache = TranslationCache(ttl_s=None)
+    service = TranslatorService(cache=cache, backend=FakeRemoteBackend(provider), breaker_failures=2)
+    service.set_language(1, "fr")
+    assert service.translate_to("fr", "hello") == "hello"
+    assert cache.get("fr", "hello") is None
+    assert service.translate_to("fr", "hello") == "hello"
+    assert service.stats()["languages"]["fr"]["errors"] == 2
+    # two failures open the breaker: the provider is not asked again
+    assert service.translate_to("fr", "hello") == "hello"
+    assert provider.calls == 2
+
+
+def test_real_translations_are_cached():
+    provider = QuotaProvider("bonjour")
+    cache = TranslationCache(ttl_s=None)
+    service = TranslatorService(cache=cache, backend=FakeRemoteBackend(provider))
+    service.set_language(1, "fr")
+    assert service.translate_to("fr", "hello") == "bonjour"
+    assert service.translate_to("fr", "hello") == "bonjour"
+    assert provider.calls == 1
+    assert cache.get("fr", "hello") == "bonjour"
+
+
+def test_typing_prefixes_are_not_written_to_disk(tmp_path):
+    provider = QuotaProvider("hello")
+    cache = TranslationCache(ttl_s=None, path=str(tmp_path / "t.sqlite3"))
+    try:
+        service = TranslatorService(cache=cache, backend=FakeRemoteBackend(provider))
+        assert service.text_for_bert("bonj", final=False) == "hello"
+        assert service.text_for_bert("bonj", final=False) == "hello"
+        assert provider.calls == 1
+        assert cache.stats()["stored"] == 0
+        assert service.text_for_bert("bonjour") == "hello"
+        assert cache.stats()["stored"] == 1
+    finally:
+        cache.close()
@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pytest
+
+from app.services.translation_cache import TranslationCache
+from app.utils.translation_backends import PhraseTableBackend
+from app.utils.translator_service import TranslatorService
+
+
+class BlockingBackend(PhraseTableBackend):
+    # a remote backend stand-in whose calls wait until `release` is set
+    name = "blocking"
+    remote = True
+
+    def __init__(self, tables):
+        super().__init__(tables)
+        self.release = threading.Event()
+
+    def create(self, lang):
+        table = super().create(lang)
+        backend = self
+
+        class Slow:
+            def translate(self, text):
+                backend.release.wait(5)
+                return table.translate(text)
+
+        return Slow()
+
+
+class FailingBackend(PhraseTableBackend):
+    name = "failing"
+    remote = True
+
+    def create(self, lang):
+        class Broken:
+            calls = 0
+
+            def translate(self, text):
+                Broken.calls += 1
+                raise ConnectionError("provider down")
+
+        self.translator = Broken
+        return Broken()
+
+
+@pytest.fixture
+def make_service():
+    services = []
+
+    def make(**kwargs):
+        kwargs.setdefault("cache", TranslationCache(ttl_s=None))
+        service = TranslatorService(**kwargs)
+        services.append(service)
+        return service
+
+    yield make
+    for service in services:
+        service.close()
+
+
+def test_languages_past_the_deadline_go_out_untranslated(make_service):
+    slow = BlockingBackend({"fr": {"hello": "bonjour"}})
+    fast = PhraseTableBackend({"es": {"hello": "hola"}, "en": {"hello": "hello"}})
+    service = make_service(backend=fast, backends={"fr": slow}, deadline_s=0.05)
+    service.set_language(1, "fr")
+    service.set_language(2, "es")
+
+    out = service.build_translations_map("hello")
+    assert out == {"fr": "hello", "es": "hola", "en": "hello"}
+    assert service.stats()["languages"]["fr"]["timeouts"] == 1
+
+    # the late call still finishes and lands in the cache for the next message
+    slow.release.set()
+    deadline = time.monotonic() + 5
+    while service.cache.get("fr", "hello") is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert service.build_translations_map("hello")["fr"] == "bonjour"
+
+
+def test_open_breaker_skips_the_backend(make_service):
+    failing = FailingBackend({"fr": {"hello": "bonjour"}})
+    service = make_service(backend=failing, breaker_failures=2, breaker_cooldown_s=60)
+    service.set_language(1, "fr")
+    for _ in range(4):
+        assert service.translate_to("fr", "hello") == "hello"
+    stats = service.stats()["languages"]["fr"]
+    assert failing.translator.calls == 2
+    assert stats["errors"] == 2 and stats["skipped"] == 2
+    assert stats["breaker"]["state"] == "open"
+    assert service.cache.get("fr", "hello") is None
+
+
+def test_close_stops_the_fan_out_pool(make_service):
+    service = make_service(backend=PhraseTableBackend({"fr": {"hello": "bonjour"}}))
+    service.close()
+    with pytest.raises(RuntimeError):
+        service._executor.submit(lambda: None)
@@ -0,0 +1,93 @@
+import random
+import threading
+import time
+
+import pytest
+
+from app.services.work_pipeline import WorkPipeline
+
+
+@pytest.fixture
+def pipeline():
+    p = WorkPipeline(max_workers=4, name="test-pipeline")
+    yield p
+    p.shutdown()
+
+
+def _wait_for(cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not cond() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return cond()
+
+
+def test_submit_passes_the_result_to_on_done(pipeline):
+    got = []
+    fut = pipeline.submit(lambda a, b: a + b, 2, 3, on_done=got.append)
+    assert fut.result(timeout=5) == 5
+    assert got == [5]
+
+
+def test_ordered_jobs_of_one_key_run_in_submission_order(pipeline):
+    seen, lock = [], threading.Lock()
+
+    def job(i):
+        # later jobs are faster: without ordering they would overtake earlier ones
+        time.sleep(0.002 * (20 - i))
+        with lock:
+            seen.append(i)
+
+    for i in range(20):
+        pipeline.submit_ordered("alice", job, i)
+    assert _wait_for(lambda: len(seen) == 20)
+    assert seen == list(range(20))
+
+
+def test_ordering_holds_per_key_under_concurrent_keys(pipeline):
+    seen, lock = {}, threading.Lock()
+    rng = random.Random(0)
+
+    def job(key, i, delay):
+        time.sleep(delay)
+        with lock:
+            seen.setdefault(key, []).append(i)
+
+    def producer(key):
+        for i in range(25):
+            pipeline.submit_ordered(key, job, key, i, rng.random() * 0.002)
+
+    producers = [threading.Thread(target=producer, args=(k,)) for k in range(6)]
+    for t in producers:
+        t.start()
+    for t in producers:
+        t.join()
+    assert _wait_for(lambda: sum(len(v) for v in seen.values()) == 150)
+    assert seen == {k: list(range(25)) for k in range(6)}
+
+
+def test_keys_run_concurrently(pipeline):
+    both_running = threading.Barrier(2, timeout=5)
+
+    def job():
+        both_running.wait()
+
+    pipeline.submit_ordered("a", job)
+    pipeline.submit_ordered("b", job)
+    assert _wait_for(lambda: pipeline.stats()["completed"] == 2)
+    assert pipeline.stats()["failed"] == 0
+
+
+def test_a_raising_job_still_releases_its_key(pipeline):
+    seen = []
+
+    def boom():
+        raise ValueError("bad message")
+
+    pipeline.submit_ordered("alice", boom)
+    pipeline.submit_ordered("alice", seen.append, "after")
+    assert _wait_for(lambda: seen == ["after"])
+    assert _wait_for(lambda: pipeline.queue_depth() == 0)
+    # the key is free again: a new job starts a fresh chain
+    pipeline.submit_ordered("alice", seen.append, "again")
+    assert _wait_for(lambda: seen == ["after", "again"])
+    assert pipeline.stats()["failed"] == 1